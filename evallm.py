@@ -1,30 +1,98 @@
-import ollama
 import json
-import json_repair
+import hashlib
+import difflib
+import html
+import re
+import unicodedata
+import sqlite3
+import threading
 import time
+import socket
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional, Any
-from dataclasses import dataclass
+from typing import List, Dict, Optional, Any, Callable, Iterable, Iterator, Union
+from dataclasses import dataclass, fields, replace
+from contextlib import contextmanager, nullcontext
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn, TimeRemainingColumn
 from rich.logging import RichHandler
 from pydantic import BaseModel
 import logging
+import os
 import platform
-import psutil
-import GPUtil
 import sys
-import webbrowser
 import shutil
-import requests
-from jinja2 import Environment, FileSystemLoader
+import functools
+import itertools
+
+# Les dépendances lourdes (ollama, jinja2, json_repair, psutil, GPUtil, rich.progress, urllib.request, http.server) sont importées
+# dans les fonctions qui en ont besoin afin que --list et le démarrage restent rapides.
 
 # Constantes
 DEFAULT_OLLAMA_URL = 'http://localhost:11434'
 OLLAMA_API_URL = f"{DEFAULT_OLLAMA_URL}/api/version"
 EVALLM_VERSION = "4.0.0"
 GB_DIVISOR = 1024**3
+RESULT_LOG_FSYNC_EVERY = 20  # Nombre de résultats entre deux fsync du journal JSONL
+RESULT_LOG_FSYNC_INTERVAL = 2.0  # Délai maximal (s) entre deux fsync du journal JSONL
+NS_PER_S = 1e9  # Les durées renvoyées par Ollama sont en nanosecondes
+SERVER_METRICS = ("total_duration", "load_duration", "prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration")
+RESULTS_SCHEMA_VERSIONS = (1, 2)
+# Champs texte stockés une seule fois dans le schéma normalisé (version 2)
+NORMALIZED_TEXT_FIELDS = ("system_prompt", "user_prompt", "context", "commentaire", "response")
+CACHE_DIR = Path.home() / ".cache" / "evallm"
+DEFAULT_SAMPLE_INTERVAL = 1.0  # Période (s) d'échantillonnage des ressources pendant les générations
+RESOURCE_METRICS = {  # Indicateur -> (libellé, agrégation sur la durée d'une génération)
+    "ollama_rss_mb": ("RSS Ollama (Mo)", "max"),
+    "memory_percent": ("Mémoire système (%)", "max"),
+    "swap_percent": ("Swap (%)", "max"),
+    "cpu_percent": ("CPU (%)", "mean"),
+    "gpu_memory_used_mb": ("Mémoire GPU (Mo)", "max"),
+    "gpu_load_percent": ("Charge GPU (%)", "max"),
+}
+SCORE_MODES = ("exact", "normalized", "regex", "date")
+THINK_SECTION_RE = re.compile(r"<think>.*?(?:</think>|$)", re.DOTALL)
+FRENCH_MONTHS = {
+    "janvier": 1, "fevrier": 2, "mars": 3, "avril": 4, "mai": 5, "juin": 6, "juillet": 7,
+    "aout": 8, "septembre": 9, "octobre": 10, "novembre": 11, "decembre": 12,
+}
+DATE_PATTERNS = (
+    (re.compile(r"\b(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})\b"), ("year", "month", "day")),
+    (re.compile(r"\b(\d{1,2})[-/.](\d{1,2})[-/.](\d{2,4})\b"), ("day", "month", "year")),
+    (re.compile(r"\b(\d{1,2})(?:er)? (" + "|".join(FRENCH_MONTHS) + r") (\d{2,4})\b"), ("day", "month", "year")),
+)
+MODEL_KEEP_ALIVE = "30m"  # Durée de maintien en mémoire demandée au chargement explicite d'un modèle
+SKIPPED_STATUSES = ("identical", "converged", "budget")
+EARLY_STOP_MIN_SAMPLES = 3
+STATS_BOOTSTRAP_SAMPLES = 2000  # Nombre de rééchantillonnages pour les intervalles de confiance
+STATS_CONFIDENCE = 0.95
+STATS_PERCENTILES = (50, 90, 99)
+SYSTEM_INFO_CACHE_FILE = CACHE_DIR / "system_info.json"
+SYSTEM_INFO_CACHE_TTL = 600  # Durée de validité (s) des informations système statiques en cache
+STATIC_GPU_FIELDS = ("name", "memory_total")  # Seuls champs GPU conservés en cache, l'occupation change à chaque exécution
+DYNAMIC_GPU_FIELDS = ("memory_used", "memory_free", "gpu_load")
+CACHE_MODES = ("off", "read", "readwrite")
+REPORT_MODES = ("full", "compact")  # compact : réponses compressées, tableaux détaillés construits à l'affichage
+COMPACT_RENDER_MARGIN = "1500px"  # Distance à la zone visible à partir de laquelle un tableau compact est construit
+CACHE_MAX_AGE_DAYS = 30  # Âge maximal d'une entrée du cache de réponses
+CACHE_MAX_SIZE_MB = 512  # Taille maximale des réponses conservées dans le cache
+HISTORY_DB = CACHE_DIR / "history.sqlite"
+RUN_TIMESTAMP_RE = re.compile(r"_(\d{8}_\d{6})$")  # Horodatage ajouté au nom des fichiers de sortie
+SHARD_NAME_RE = re.compile(r"_shard\d+-\d+")  # Repère de tranche ajouté au nom des fichiers de sortie
+RESULT_EXTRAS = ("shard", "model_loads", "statistics", "scoring")  # Sections ajoutées au JSON en fin d'exécution
+DIFF_MIN_CHANGE = 0.05  # Écart relatif de latence minimal pour signaler une régression
+MOCK_DEFAULT_PORT = 11435
+MOCK_CHARS_PER_TOKEN = 4  # Découpage des réponses simulées en tokens
+BENCH_REPORT_SIZES = (1000, 10000, 100000)
+CLUSTER_THRESHOLD = 0.8  # Similarité de Jaccard estimée à partir de laquelle deux réponses sont regroupées
+CLUSTER_SHINGLE_SIZE = 5  # Longueur (caractères) des shingles comparés
+MINHASH_SIZE = 128  # Nombre de cases des signatures MinHash (puissance de 2)
+MINHASH_BANDS = 16  # Bandes LSH : deux réponses ne sont comparées que si une bande de leurs signatures coïncide
+MINHASH_BATCH = 2000  # Nombre de textes hachés ensemble
+TELEMETRY_LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)  # Bornes (s) des histogrammes de latence
+TELEMETRY_RATE_WINDOW = 30.0  # Fenêtre glissante (s) des débits affichés
+TELEMETRY_TEXTFILE_INTERVAL = 5.0  # Période (s) de réécriture du fichier de métriques
 
 size = shutil.get_terminal_size()
 
@@ -58,14 +126,80 @@ logging.basicConfig(
 )
 logger = logging.getLogger("evallm")
 
-# Configuration de la barre de progression
-progress_columns = [
-    SpinnerColumn(),
-    TextColumn("[progress.description]{task.description}"),
-    BarColumn(bar_width=None),
-    TaskProgressColumn(),
-    TimeRemainingColumn(),
-]
+def make_progress(telemetry: Optional["RunTelemetry"] = None, disable: bool = False) -> Any:
+    """Crée la barre de progression rich (rien n'est affiché avec disable).
+    
+    Avec telemetry, le temps restant est estimé à partir du débit mesuré de chaque modèle
+    plutôt que du rythme moyen de la barre, et les compteurs en direct sont affichés.
+    """
+    from rich.progress import (Progress, ProgressColumn, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn,
+                               TimeRemainingColumn)
+    from rich.text import Text
+    
+    class TelemetryColumn(ProgressColumn):
+        def render(self, task: Any) -> Text:
+            return Text(telemetry.describe(task.fields.get("model")), style="progress.remaining")
+    
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(bar_width=None),
+        TaskProgressColumn(),
+        TelemetryColumn() if telemetry else TimeRemainingColumn(),
+        console=console,
+        disable=disable
+    )
+
+class Tracer:
+    """Trace par intervalles des phases d'une exécution, exportée au format Chrome/Perfetto.
+    
+    Inactif par défaut : span() renvoie alors un contexte vide partagé, sans horodatage ni
+    enregistrement. Actif, chaque intervalle devient un événement complet ("ph": "X") du format
+    Trace Event, rattaché au fil d'exécution qui l'a produit : les requêtes simultanées apparaissent
+    sur des lignes distinctes dans chrome://tracing ou ui.perfetto.dev.
+    """
+    
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self._threads = {}
+        self._origin = 0.0
+    
+    def start(self) -> None:
+        self.events = []
+        self._threads = {}
+        self._origin = time.perf_counter()
+        self.enabled = True
+    
+    def span(self, name: str, **args: Any) -> Any:
+        """Contexte mesurant un intervalle nommé, args est joint à l'événement."""
+        if not self.enabled:
+            return NULL_SPAN
+        return self._span(name, args)
+    
+    @contextmanager
+    def _span(self, name: str, args: Dict[str, Any]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            thread = threading.current_thread()
+            self._threads.setdefault(thread.native_id, thread.name)
+            # list.append est atomique : pas de verrou entre les fils de génération
+            self.events.append({"name": name, "ph": "X", "pid": os.getpid(), "tid": thread.native_id,
+                                "ts": (start - self._origin) * 1e6, "dur": (end - start) * 1e6, "args": args})
+    
+    def dump(self, path: Path) -> None:
+        """Écrit la trace (fichier JSON Trace Event) et désactive le traçage."""
+        self.enabled = False
+        metadata = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                    for tid, name in self._threads.items()]
+        Path(path).write_text(json.dumps({"traceEvents": metadata + self.events, "displayTimeUnit": "ms"},
+                                         ensure_ascii=False, default=str), encoding="utf-8")
+
+NULL_SPAN = nullcontext()
+tracer = Tracer()
 
 @dataclass
 class SystemInfo:
@@ -78,16 +212,65 @@ class SystemInfo:
     memory: Dict[str, Any]
     gpu: Optional[List[Dict[str, Any]]]
     hostname: str
+    hosts: Optional[List[Dict[str, Any]]] = None
+
+@dataclass
+class RunOptions:
+    """Options d'exécution d'une comparaison (indépendantes du fichier de configuration)."""
+    concurrency: int = 1
+    resume: Optional[str] = None
+    cache: str = "off"
+    cache_dir: Path = CACHE_DIR
+    stream: bool = False
+    context_first: bool = False
+    schema_version: int = 1
+    sample_interval: float = DEFAULT_SAMPLE_INTERVAL
+    score_mode: Optional[str] = None  # Remplace score_mode de la configuration si renseigné
+    early_stop: Optional[int] = None  # Remplacent early_stop et early_stop_latency de la configuration
+    early_stop_latency: Optional[float] = None
+    num_predict: Optional[int] = None  # Remplacent num_predict, timeout et budget de la configuration
+    timeout: Optional[float] = None
+    budget: Optional[float] = None
+    keep_loaded: bool = False  # Ne pas décharger les modèles précédents (petits modèles tenant ensemble en mémoire)
+    open_browser: bool = True
+    show_progress: bool = True  # Afficher la barre de progression (désactivée par bench)
+    shard: Optional[tuple] = None  # (i, N) : n'exécuter que la i-ème des N tranches de la matrice
+    cluster_threshold: float = CLUSTER_THRESHOLD  # Similarité de regroupement des réponses proches (0 : désactivé)
+    report_mode: str = "full"  # "compact" : réponses compressées, tableaux détaillés construits à l'affichage
+    trace: bool = False  # Exporter la trace des phases au format Chrome/Perfetto à côté du rapport
+    metrics_port: Optional[int] = None  # Port local du point d'accès /metrics (format Prometheus)
+    metrics_file: Optional[str] = None  # Fichier de métriques réécrit pendant l'exécution
+
+@dataclass
+class Iteration:
+    """Une combinaison modèle × prompt système × prompt utilisateur × contexte × graine × température."""
+    model: str
+    system_prompt_id: str
+    system_prompt: str
+    user_prompt_id: str
+    user_prompt: str
+    context_id: str
+    context: str
+    seed: int
+    temperature: float
 
 class ModelConfig(BaseModel):
     models: List[str]
     system_prompts: Dict[str, str]
-    user_prompts: Dict[str, str]
-    contexts: Dict[str, str]
+    # Dictionnaire identifiant -> texte (ou chemin de fichier), ou chemin d'un répertoire / fichier JSONL (voir TextSource)
+    user_prompts: Union[Dict[str, str], str]
+    contexts: Union[Dict[str, str], str]
     seeds: List[int] = [42]
     temperatures: List[float] = [0.7]
     commentaire: str = ""
     resultats: List[str] = []
+    score_mode: str = "normalized"  # exact, normalized, regex ou date (voir AnswerMatcher)
+    strip_think: bool = True
+    early_stop: int = 0  # Nombre de réponses identiques consécutives arrêtant une cellule (0 : désactivé)
+    early_stop_latency: float = 0.0  # Largeur relative de l'IC 95 % de la latence arrêtant une cellule (0 : désactivé)
+    num_predict: Optional[int] = None  # Nombre maximal de tokens générés par réponse
+    timeout: Optional[float] = None  # Durée maximale d'un appel (secondes)
+    budget: Optional[float] = None  # Durée maximale de l'exécution complète (secondes)
 
 class Result(BaseModel):
     model: str
@@ -103,6 +286,654 @@ class Result(BaseModel):
     response_time: float
     commentaire: str
     Resultats: Optional[List[str]] = None
+    cached: bool = False
+    host: Optional[str] = None
+    # None pour une génération complète, "timeout" pour une réponse partielle interrompue
+    # par le délai, sinon l'une des valeurs de SKIPPED_STATUSES (itération non exécutée)
+    status: Optional[str] = None
+    # Compteurs renvoyés par le serveur Ollama (durées en nanosecondes)
+    total_duration: Optional[int] = None
+    load_duration: Optional[int] = None
+    prompt_eval_count: Optional[int] = None
+    prompt_eval_duration: Optional[int] = None
+    eval_count: Optional[int] = None
+    eval_duration: Optional[int] = None
+    # Mesures côté client en mode streaming (secondes)
+    ttft: Optional[float] = None
+    inter_token_p50: Optional[float] = None
+    inter_token_p95: Optional[float] = None
+    inter_token_max: Optional[float] = None
+    stream_tokens_per_s: Optional[float] = None
+    # Réponse conforme à l'une des réponses attendues (None si la configuration n'en fournit pas)
+    correct: Optional[bool] = None
+    # Ressources observées pendant la génération (voir RESOURCE_METRICS)
+    resources: Optional[Dict[str, Optional[float]]] = None
+
+class ResultLog:
+    """Journal JSONL en ajout seul : un Result par ligne, synchronisé sur disque par lots."""
+    
+    def __init__(self, path: Path, fsync_every: int = RESULT_LOG_FSYNC_EVERY,
+                 fsync_interval: float = RESULT_LOG_FSYNC_INTERVAL):
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+    
+    def append(self, result: Result) -> None:
+        """Ajoute un résultat en fin de journal."""
+        self._file.write(json.dumps(result.model_dump(), ensure_ascii=False) + "\n")
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+    
+    def sync(self) -> None:
+        """Force l'écriture sur disque des résultats en attente."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+    
+    def close(self) -> None:
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+    
+    def __enter__(self) -> "ResultLog":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class ResponseCache:
+    """Cache persistant (SQLite) des réponses, adressé par le contenu de la requête.
+    
+    La clé combine l'empreinte (digest) du modèle renvoyée par ollama.list(), la liste
+    complète des messages et les options de génération : une nouvelle version d'un modèle
+    portant le même nom ne réutilise donc jamais les anciennes réponses.
+    """
+    
+    def __init__(self, cache_dir: Path, mode: str, model_digests: Dict[str, str],
+                 max_age_days: float = CACHE_MAX_AGE_DAYS, max_size_mb: float = CACHE_MAX_SIZE_MB):
+        self.mode = mode
+        self.model_digests = model_digests
+        self.max_age = max_age_days * 86400
+        self.max_size = int(max_size_mb * 1024**2)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        self.path = Path(cache_dir) / "responses.sqlite"
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, model TEXT, response TEXT, size INTEGER, created_at REAL, last_used REAL, metrics TEXT)"
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(responses)")]
+        if "metrics" not in columns:
+            self._db.execute("ALTER TABLE responses ADD COLUMN metrics TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+        self._db.commit()
+        self.evict()
+    
+    def key(self, model: str, messages: List[Dict[str, str]], options: Dict[str, Any]) -> Optional[str]:
+        """Calcule la clé d'une requête, ou None si le digest du modèle est inconnu."""
+        digest = self.model_digests.get(model)
+        if not digest:
+            return None
+        payload = json.dumps({"digest": digest, "messages": messages, "options": options},
+                             sort_keys=True, ensure_ascii=False)
+        return content_hash(payload)
+    
+    def get(self, model: str, messages: List[Dict[str, str]], options: Dict[str, Any]) -> Optional[tuple]:
+        """Renvoie la réponse en cache et ses compteurs serveur pour cette requête, si elle existe."""
+        key = self.key(model, messages, options)
+        if key is None:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT response, metrics FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        return row[0], json.loads(row[1]) if row[1] else {}
+    
+    def contains(self, model: str, messages: List[Dict[str, str]], options: Dict[str, Any]) -> bool:
+        """Indique si la requête est en cache, sans mettre à jour les statistiques."""
+        key = self.key(model, messages, options)
+        if key is None:
+            return False
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone() is not None
+    
+    def put(self, model: str, messages: List[Dict[str, str]], options: Dict[str, Any], response: str,
+            metrics: Optional[Dict[str, Any]] = None) -> None:
+        """Enregistre une réponse (uniquement en mode readwrite)."""
+        if self.mode != "readwrite":
+            return
+        key = self.key(model, messages, options)
+        if key is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_used, metrics) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode('utf-8')), now, now, json.dumps(metrics or {}))
+            )
+            self._db.commit()
+    
+    def evict(self) -> None:
+        """Supprime les entrées trop anciennes puis les moins récemment utilisées au-delà de la taille maximale."""
+        with self._lock:
+            self._db.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.max_age,))
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_size:
+                excess = total - self.max_size
+                freed = 0
+                stale = []
+                for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_used"):
+                    if freed >= excess:
+                        break
+                    stale.append((key,))
+                    freed += size
+                self._db.executemany("DELETE FROM responses WHERE key = ?", stale)
+            self._db.commit()
+    
+    def close(self) -> None:
+        self.evict()
+        self._db.close()
+
+class ResourceSampler:
+    """Échantillonne en tâche de fond l'utilisation des ressources pendant les générations.
+    
+    Un seul thread relève périodiquement la mémoire résidente des processus Ollama locaux,
+    la pression mémoire, l'utilisation CPU et, si GPUtil est disponible, la mémoire et la
+    charge des GPU. Chaque résultat agrège ensuite les échantillons pris pendant sa génération,
+    ce qui fonctionne aussi avec des requêtes simultanées. Sans psutil l'échantillonneur est
+    inactif, sans GPU les indicateurs GPU restent vides.
+    """
+    
+    MAX_SAMPLES = 100_000
+    PROCESS_REFRESH_EVERY = 10  # Nombre d'échantillons entre deux recherches des processus Ollama
+    
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = deque(maxlen=self.MAX_SAMPLES)
+        self._stop = threading.Event()
+        self._thread = None
+        self._processes = []
+        self._gpu_available = True
+        try:
+            import psutil
+            self._psutil = psutil
+        except ImportError:
+            self._psutil = None
+            logger.warning("psutil indisponible, les ressources ne seront pas échantillonnées")
+    
+    @property
+    def enabled(self) -> bool:
+        return self._psutil is not None and self.interval > 0
+    
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        self._psutil.cpu_percent(interval=None)
+        self._thread = threading.Thread(target=self._run, name="evallm-sampler", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+    
+    def _run(self) -> None:
+        count = 0
+        while not self._stop.is_set():
+            if count % self.PROCESS_REFRESH_EVERY == 0:
+                self._refresh_processes()
+            self.samples.append(self._sample())
+            count += 1
+            self._stop.wait(self.interval)
+    
+    def _refresh_processes(self) -> None:
+        """Recherche les processus Ollama locaux (serveur et runners de modèles)."""
+        self._processes = []
+        for process in self._psutil.process_iter(['name']):
+            if 'ollama' in (process.info.get('name') or '').lower():
+                self._processes.append(process)
+    
+    def _sample(self) -> Dict[str, Optional[float]]:
+        psutil = self._psutil
+        rss = 0
+        for process in self._processes:
+            try:
+                rss += process.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        sample = {
+            "time": time.time(),
+            "ollama_rss_mb": rss / 1024**2 if rss else None,
+            "memory_percent": psutil.virtual_memory().percent,
+            "swap_percent": psutil.swap_memory().percent,
+            "cpu_percent": psutil.cpu_percent(interval=None),
+            "gpu_memory_used_mb": None,
+            "gpu_load_percent": None,
+        }
+        if self._gpu_available:
+            try:
+                import GPUtil
+                gpus = GPUtil.getGPUs()
+                if gpus:
+                    sample["gpu_memory_used_mb"] = sum(gpu.memoryUsed for gpu in gpus)
+                    sample["gpu_load_percent"] = max(gpu.load for gpu in gpus) * 100
+                else:
+                    self._gpu_available = False
+            except Exception as e:
+                logger.debug(f"Échantillonnage GPU désactivé: {e}")
+                self._gpu_available = False
+        return sample
+    
+    def summarize(self, start: float, end: float) -> Optional[Dict[str, Optional[float]]]:
+        """Agrège les échantillons pris entre start et end (le dernier échantillon antérieur si aucun)."""
+        if not self.enabled:
+            return None
+        samples = list(self.samples)
+        window = [sample for sample in samples if start <= sample["time"] <= end]
+        if not window:
+            window = [sample for sample in samples if sample["time"] <= end][-1:]
+        if not window:
+            return None
+        summary = {}
+        for metric, (_, aggregation) in RESOURCE_METRICS.items():
+            values = [sample[metric] for sample in window if sample[metric] is not None]
+            if not values:
+                summary[metric] = None
+            elif aggregation == "max":
+                summary[metric] = max(values)
+            else:
+                summary[metric] = sum(values) / len(values)
+        return summary
+
+def model_names(response: Any) -> List[str]:
+    """Extrait les noms de modèles d'une réponse de client.list() ou client.ps()."""
+    models = response.models if hasattr(response, "models") else response.get("models", [])
+    return [getattr(model, "model", None) or model.get("name") for model in models]
+
+class OllamaHost:
+    """Un serveur Ollama et son état vu par le répartiteur."""
+    
+    def __init__(self, url: str, capacity: int, timeout: Optional[float] = None):
+        import ollama
+        self.url = url
+        self._call = threading.local()  # Échéance et réponse HTTP de l'appel en cours, propres à chaque thread
+        self.client = ollama.Client(host=url, timeout=timeout,
+                                    event_hooks={"request": [self._bound_request], "response": [self._track_response]})
+        # Chargements et déchargements sans délai : un chargement à froid peut dépasser celui d'une génération
+        self.lifecycle_client = ollama.Client(host=url) if timeout else self.client
+        self.capacity = capacity
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.listed_models = []  # Entrées de client.list() (nom, taille, empreinte) lors du dernier refresh
+        self.available_models = set()
+        self.loaded_models = set()
+    
+    def _bound_request(self, request: Any) -> None:
+        state = getattr(self._call, "state", None)
+        if state is not None:
+            remaining = max(state["deadline"] - time.time(), 0.001)
+            request.extensions["timeout"] = dict.fromkeys(("connect", "read", "write", "pool"), remaining)
+    
+    def _track_response(self, response: Any) -> None:
+        state = getattr(self._call, "state", None)
+        if state is not None:
+            state["response"] = response
+    
+    @contextmanager
+    def bounded_by(self, deadline: float) -> Iterator[None]:
+        """Borne les requêtes émises par ce thread sur ce serveur jusqu'à deadline (horodatage time.time()).
+        
+        Chaque requête reçoit le temps restant comme délai HTTP, ce qui couvre un serveur muet même
+        quand seul le budget est fixé, et la connexion de la réponse en cours est coupée à l'échéance :
+        un flux bloqué après quelques fragments est interrompu à l'heure dite. Le client (et ses
+        connexions) reste partagé entre les appels.
+        """
+        state = {"deadline": deadline, "response": None}
+        
+        def expire() -> None:
+            # Fermer la réponse ne réveille pas un recv bloqué dans un autre thread, couper la socket si
+            network_stream = state["response"] and state["response"].extensions.get("network_stream")
+            sock = network_stream and network_stream.get_extra_info("socket")
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        
+        watchdog = threading.Timer(max(deadline - time.time(), 0), expire)
+        watchdog.daemon = True
+        self._call.state = state
+        watchdog.start()
+        try:
+            yield
+        finally:
+            watchdog.cancel()
+            self._call.state = None
+
+class HostPool:
+    """Répartit les requêtes entre un ou plusieurs serveurs Ollama.
+    
+    Une requête part en priorité vers un serveur qui a déjà le modèle en mémoire et une place
+    libre, sinon vers le serveur libre le moins chargé. Chaque serveur accepte au plus
+    capacity requêtes simultanées ; au-delà, l'appelant attend qu'une place se libère.
+    timeout borne l'attente de chaque lecture HTTP, y compris quand le serveur ne répond plus.
+    """
+    
+    def __init__(self, urls: List[str], capacity: int = 1, timeout: Optional[float] = None):
+        self.hosts = [OllamaHost(url, capacity, timeout) for url in urls]
+        self._condition = threading.Condition()
+    
+    @property
+    def capacity(self) -> int:
+        return sum(host.capacity for host in self.hosts)
+    
+    def refresh(self) -> None:
+        """Met à jour les modèles disponibles et chargés en mémoire sur chaque serveur.
+        
+        Un serveur injoignable est retiré du répartiteur avec un avertissement ; l'erreur n'est
+        propagée que si aucun serveur ne répond.
+        """
+        reachable = []
+        for host in self.hosts:
+            try:
+                response = host.client.list()
+            except Exception as e:
+                if len(self.hosts) == 1:
+                    raise
+                logger.warning(f"Serveur Ollama injoignable, retiré de l'exécution : {host.url} ({e})")
+                continue
+            reachable.append(host)
+            host.listed_models = list(response.models)
+            host.available_models = set(model_names(response))
+            try:
+                host.loaded_models = set(model_names(host.client.ps()))
+            except Exception as e:
+                logger.debug(f"Impossible de lister les modèles chargés sur {host.url}: {e}")
+        if not reachable:
+            raise RuntimeError(f"Aucun serveur Ollama joignable parmi {', '.join(host.url for host in self.hosts)}")
+        self.hosts = reachable
+    
+    def hosts_for(self, model: str) -> List[OllamaHost]:
+        """Serveurs sur lesquels le modèle est disponible (tous si aucun ne le déclare)."""
+        return [host for host in self.hosts if model in host.available_models] or self.hosts
+    
+    def _select(self, model: str) -> Optional[OllamaHost]:
+        free = [host for host in self.hosts_for(model) if host.in_flight < host.capacity]
+        if not free:
+            return None
+        warm = [host for host in free if model in host.loaded_models]
+        return min(warm or free, key=lambda host: host.in_flight / host.capacity)
+    
+    @contextmanager
+    def acquire(self, model: str) -> Iterator[OllamaHost]:
+        """Réserve une place sur le serveur le plus adapté pendant la durée d'une requête."""
+        with self._condition:
+            host = self._select(model)
+            while host is None:
+                self._condition.wait()
+                host = self._select(model)
+            host.in_flight += 1
+        failed = False
+        try:
+            yield host
+        except Exception:
+            failed = True
+            raise
+        finally:
+            with self._condition:
+                host.in_flight -= 1
+                host.requests += 1
+                if failed:
+                    host.errors += 1
+                else:
+                    host.loaded_models.add(model)
+                self._condition.notify_all()
+
+class RunTelemetry:
+    """Compteurs en direct d'une exécution : débits, requêtes en cours, erreurs et latences par modèle.
+    
+    Le temps restant de chaque modèle est estimé à partir de son propre débit (itérations terminées
+    depuis son chargement). Un modèle pas encore commencé reprend le débit des modèles déjà mesurés,
+    ramené à sa taille quand le serveur l'annonce : un modèle 70B n'est pas supposé aussi rapide
+    qu'un modèle 1B. Les compteurs sont exposés au format texte Prometheus, via prometheus() pour
+    un point d'accès /metrics et, si metrics_file est renseigné, dans un fichier réécrit périodiquement
+    (collecteur textfile de node_exporter).
+    """
+    
+    OUTCOMES = ("ok", "error", "timeout", "cached", "skipped")
+    
+    def __init__(self, pool: HostPool, pending_per_model: Dict[str, int],
+                 model_sizes: Optional[Dict[str, Optional[int]]] = None, metrics_file: Optional[str] = None):
+        self.pool = pool
+        self.metrics_file = Path(metrics_file) if metrics_file else None
+        self.run_start = time.time()
+        self._lock = threading.Lock()
+        self._recent = deque()  # (fin, tokens) des requêtes de la fenêtre glissante
+        self._stop = threading.Event()
+        self._thread = None
+        self.models = {
+            model: {
+                "pending": pending, "done": 0, "started": None, "busy": 0.0, "size": (model_sizes or {}).get(model),
+                "outcomes": dict.fromkeys(self.OUTCOMES, 0), "tokens": 0,
+                "buckets": [0] * len(TELEMETRY_LATENCY_BUCKETS), "latency_sum": 0.0, "latency_count": 0,
+            }
+            for model, pending in pending_per_model.items()
+        }
+    
+    def start(self) -> None:
+        if self.metrics_file:
+            self._thread = threading.Thread(target=self._run, name="evallm-metrics", daemon=True)
+            self._thread.start()
+    
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self.write_textfile()
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.write_textfile()
+            self._stop.wait(TELEMETRY_TEXTFILE_INTERVAL)
+    
+    def begin(self, model: str) -> None:
+        """Marque le début des générations d'un modèle (après son chargement)."""
+        with self._lock:
+            self.models[model]["started"] = time.time()
+    
+    def finish(self, model: str) -> None:
+        """Fige la durée de travail d'un modèle au passage au suivant."""
+        with self._lock:
+            state = self.models[model]
+            if state["started"] is not None:
+                state["busy"] += time.time() - state["started"]
+                state["started"] = None
+    
+    def record(self, result: Result) -> None:
+        """Comptabilise un résultat produit pendant l'exécution (hors reprise)."""
+        now = time.time()
+        if result.cached:
+            outcome = "cached"
+        elif result.status in SKIPPED_STATUSES:
+            outcome = "skipped"
+        elif result.response.startswith("ERREUR:"):
+            outcome = "error"
+        else:
+            outcome = "timeout" if result.status == "timeout" else "ok"
+        with self._lock:
+            state = self.models[result.model]
+            state["outcomes"][outcome] += 1
+            if outcome == "cached":
+                return
+            state["done"] += 1
+            if outcome == "skipped":
+                return
+            state["tokens"] += result.eval_count or 0
+            self._recent.append((now, result.eval_count or 0))
+            if is_measured(result) and outcome == "ok":
+                state["latency_sum"] += result.response_time
+                state["latency_count"] += 1
+                for index, bound in enumerate(TELEMETRY_LATENCY_BUCKETS):
+                    if result.response_time <= bound:
+                        state["buckets"][index] += 1
+    
+    @property
+    def in_flight(self) -> int:
+        return sum(host.in_flight for host in self.pool.hosts)
+    
+    def rates(self) -> tuple:
+        """Requêtes/s et tokens/s sur la fenêtre glissante."""
+        now = time.time()
+        with self._lock:
+            while self._recent and self._recent[0][0] < now - TELEMETRY_RATE_WINDOW:
+                self._recent.popleft()
+            requests = len(self._recent)
+            tokens = sum(count for _, count in self._recent)
+        window = min(TELEMETRY_RATE_WINDOW, now - self.run_start)
+        if window <= 0:
+            return 0.0, 0.0
+        return requests / window, tokens / window
+    
+    def _elapsed(self, state: Dict[str, Any], now: float) -> float:
+        return state["busy"] + (now - state["started"] if state["started"] is not None else 0.0)
+    
+    def model_eta(self, model: str) -> Optional[float]:
+        """Temps restant estimé (s) pour un modèle, None tant qu'aucun débit n'est mesuré."""
+        now = time.time()
+        with self._lock:
+            state = self.models[model]
+            remaining = state["pending"] - state["done"]
+            if remaining <= 0:
+                return 0.0
+            if state["done"]:
+                return remaining * self._elapsed(state, now) / state["done"]
+            measured = [other for other in self.models.values() if other["done"]]
+            if not measured:
+                return None
+            # Débit des modèles mesurés ramené à la taille du modèle, à défaut débit moyen
+            if state["size"] and all(other["size"] for other in measured):
+                per_byte = sum(self._elapsed(other, now) for other in measured) / \
+                    sum(other["done"] * other["size"] for other in measured)
+                return remaining * per_byte * state["size"]
+            return remaining * sum(self._elapsed(other, now) for other in measured) / \
+                sum(other["done"] for other in measured)
+    
+    def eta(self) -> Optional[float]:
+        """Temps restant estimé (s) pour l'ensemble de l'exécution."""
+        etas = [self.model_eta(model) for model in self.models]
+        return None if None in etas else sum(etas)
+    
+    def describe(self, model: Optional[str] = None) -> str:
+        """Texte de la colonne de progression : compteurs globaux ou temps restant d'un modèle."""
+        eta = self.model_eta(model) if model else self.eta()
+        eta_text = "reste -:--:--" if eta is None else \
+            f"reste {int(eta) // 3600}:{int(eta) % 3600 // 60:02d}:{int(eta) % 60:02d}"
+        if model:
+            return eta_text
+        requests_per_s, tokens_per_s = self.rates()
+        with self._lock:
+            errors = sum(state["outcomes"]["error"] for state in self.models.values())
+        return (f"{requests_per_s:.2f} req/s · {tokens_per_s:.0f} tok/s · {self.in_flight} en cours · "
+                f"{errors} erreur{'s' if errors > 1 else ''} · {eta_text}")
+    
+    def prometheus(self) -> str:
+        """Compteurs au format texte d'exposition Prometheus."""
+        def label(value: str) -> str:
+            return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        
+        requests_per_s, tokens_per_s = self.rates()
+        etas = {model: self.model_eta(model) for model in self.models}
+        lines = [
+            "# HELP evallm_requests_total Itérations terminées par modèle et issue.",
+            "# TYPE evallm_requests_total counter",
+        ]
+        with self._lock:
+            models = {model: {**state, "outcomes": dict(state["outcomes"]), "buckets": list(state["buckets"])}
+                      for model, state in self.models.items()}
+        for model, state in models.items():
+            for outcome, count in state["outcomes"].items():
+                lines.append(f'evallm_requests_total{{model="{label(model)}",outcome="{outcome}"}} {count}')
+        lines += ["# HELP evallm_generated_tokens_total Tokens générés par modèle.",
+                  "# TYPE evallm_generated_tokens_total counter"]
+        lines += [f'evallm_generated_tokens_total{{model="{label(model)}"}} {state["tokens"]}'
+                  for model, state in models.items()]
+        lines += ["# HELP evallm_request_duration_seconds Temps de réponse des générations réussies.",
+                  "# TYPE evallm_request_duration_seconds histogram"]
+        for model, state in models.items():
+            name = label(model)
+            for bound, count in zip(TELEMETRY_LATENCY_BUCKETS, state["buckets"]):
+                lines.append(f'evallm_request_duration_seconds_bucket{{model="{name}",le="{bound}"}} {count}')
+            lines.append(f'evallm_request_duration_seconds_bucket{{model="{name}",le="+Inf"}} {state["latency_count"]}')
+            lines.append(f'evallm_request_duration_seconds_sum{{model="{name}"}} {state["latency_sum"]}')
+            lines.append(f'evallm_request_duration_seconds_count{{model="{name}"}} {state["latency_count"]}')
+        lines += ["# HELP evallm_iterations_remaining Itérations restant à exécuter par modèle.",
+                  "# TYPE evallm_iterations_remaining gauge"]
+        lines += [f'evallm_iterations_remaining{{model="{label(model)}"}} {state["pending"] - state["done"]}'
+                  for model, state in models.items()]
+        lines += ["# HELP evallm_model_eta_seconds Temps restant estimé par modèle.",
+                  "# TYPE evallm_model_eta_seconds gauge"]
+        lines += [f'evallm_model_eta_seconds{{model="{label(model)}"}} {eta}'
+                  for model, eta in etas.items() if eta is not None]
+        total_eta = None if None in etas.values() else sum(etas.values())
+        for name, kind, description, value in (
+            ("evallm_eta_seconds", "gauge", "Temps restant estimé de l'exécution.", total_eta),
+            ("evallm_in_flight_requests", "gauge", "Requêtes en cours sur les serveurs Ollama.", self.in_flight),
+            ("evallm_requests_per_second", "gauge",
+             f"Requêtes terminées par seconde sur les {TELEMETRY_RATE_WINDOW:.0f} dernières secondes.", requests_per_s),
+            ("evallm_tokens_per_second", "gauge",
+             f"Tokens générés par seconde sur les {TELEMETRY_RATE_WINDOW:.0f} dernières secondes.", tokens_per_s),
+            ("evallm_run_start_time_seconds", "gauge", "Début de l'exécution (horodatage Unix).", self.run_start),
+        ):
+            if value is not None:
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+    
+    def write_textfile(self) -> None:
+        """Réécrit le fichier de métriques de façon atomique (lu par le collecteur textfile)."""
+        try:
+            temp_file = self.metrics_file.with_name(self.metrics_file.name + ".tmp")
+            temp_file.write_text(self.prometheus(), encoding="utf-8")
+            os.replace(temp_file, self.metrics_file)
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire le fichier de métriques {self.metrics_file}: {e}")
+
+def start_metrics_server(telemetry: RunTelemetry, host: str = "127.0.0.1", port: int = 0) -> Any:
+    """Expose les compteurs de l'exécution en HTTP sur /metrics (format texte Prometheus)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format: str, *args: Any) -> None:
+            logger.debug(f"[metrics] {format % args}")
+        
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = telemetry.prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+    
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="evallm-metrics-http", daemon=True).start()
+    return server
 
 # Template HTML intégré
 HTML_TEMPLATE = r"""
@@ -182,6 +1013,12 @@ HTML_TEMPLATE = r"""
         .system-info table { margin: 10px 0; width: 100%; }
         .system-info td:first-child { font-weight: bold; width: 200px; }
         .identical { color: #666; font-style: italic; }
+        .near-duplicate ins { background-color: #e6ffec; text-decoration: none; }
+        .near-duplicate del { background-color: #ffebe9; color: #666; }
+        .cluster-badge { display: inline-block; background-color: #e8eaf6; color: #1a237e; padding: 2px 6px;
+                         border-radius: 3px; font-size: 0.8em; margin-bottom: 5px; }
+        .resource-charts { display: flex; flex-wrap: wrap; gap: 20px; }
+        .resource-chart { font-size: 0.9em; color: #1a237e; }
         .think-section { color: #666; font-style: italic; }
         think { display: block; color: #666; font-style: italic; margin: 5px 0; }
         @media screen and (max-width: 768px) {
@@ -294,6 +1131,58 @@ HTML_TEMPLATE = r"""
         </table>
     </div>
     
+    {% if system_info.hosts and system_info.hosts|length > 1 %}
+    <div class="system-info">
+        <h3>Serveurs Ollama</h3>
+        <table class="summary-table">
+            <tr>
+                <th>Serveur</th>
+                <th>Ollama</th>
+                <th>Requêtes</th>
+                <th>Erreurs</th>
+                <th>Temps moyen (s)</th>
+                <th>Requêtes/s</th>
+                <th>Tokens/s (cumul)</th>
+                <th>Décodage (tokens/s)</th>
+            </tr>
+            {% for host in system_info.hosts %}
+            <tr>
+                <td>{{ host.url }}</td>
+                <td>{{ host.ollama_version }}</td>
+                <td>{{ host.requests }}</td>
+                <td>{{ host.errors }}</td>
+                <td>{{ "%.2f"|format(host.avg_response_time) if host.avg_response_time is not none else "-" }}</td>
+                <td>{{ "%.2f"|format(host.requests_per_s) if host.requests_per_s is not none else "-" }}</td>
+                <td>{{ "%.1f"|format(host.tokens_per_s) if host.tokens_per_s is not none else "-" }}</td>
+                <td>{{ "%.1f"|format(host.decode_tps) if host.decode_tps is not none else "-" }}</td>
+            </tr>
+            {% endfor %}
+        </table>
+    </div>
+    {% endif %}
+    
+    {% if model_loads %}
+    <div class="system-info">
+        <h3>Chargement des Modèles</h3>
+        <table class="summary-table">
+            <tr>
+                <th>Modèle</th>
+                {% if system_info.hosts and system_info.hosts|length > 1 %}<th>Serveur</th>{% endif %}
+                <th>Chargement (s)</th>
+                <th>Durée de l'appel (s)</th>
+            </tr>
+            {% for load in model_loads %}
+            <tr>
+                <td>{{ load.model }}</td>
+                {% if system_info.hosts and system_info.hosts|length > 1 %}<td>{{ load.host }}</td>{% endif %}
+                <td>{{ "%.2f"|format(load.load_time) }}{% if load.already_loaded %} <span class="identical">(déjà en mémoire)</span>{% endif %}</td>
+                <td>{{ "%.2f"|format(load.wall_time) }}</td>
+            </tr>
+            {% endfor %}
+        </table>
+    </div>
+    {% endif %}
+    
     <a href="{{ output_file|replace('.html', '.json') }}" class="json-link">📊 Voir les données au format JSON</a>
 
     <h2>Synthèse des Performances</h2>
@@ -303,18 +1192,157 @@ HTML_TEMPLATE = r"""
             <th>Temps moyen (s)</th>
             <th>Temps minimum (s)</th>
             <th>Temps maximum (s)</th>
+            {% if show_ttft %}
+            <th>TTFT p50 (s)</th>
+            <th>TTFT p95 (s)</th>
+            {% endif %}
+            <th>Chargement moyen (s)</th>
             <th>Nombre de tokens moyen</th>
+            <th>Tokens de prompt évalués (moyenne)</th>
+            <th>Prefill (tokens/s)</th>
+            <th>Décodage (tokens/s)</th>
         </tr>
         {% for model_temp, times in model_temp_times.items() %}
         <tr>
             <td><a href="#model_{{ model_temp_first_ids[model_temp] }}">{{ model_temp.split(' (')[0] }}</a> <span class="temp-badge">temp={{ model_temp.split('=')[1].split(')')[0] }}</span></td>
+            {% if times %}
             <td>{{ "%.2f"|format(sum(times)/len(times)) }}</td>
             <td>{{ "%.2f"|format(min(times)) }}</td>
             <td>{{ "%.2f"|format(max(times)) }}</td>
-            <td>{{ avg_tokens[model_temp] }}</td>
+            {% else %}
+            <td colspan="3" class="identical">(cache)</td>
+            {% endif %}
+            {% set metrics = server_metrics[model_temp] %}
+            {% if show_ttft %}
+            <td>{{ "%.3f"|format(metrics.ttft_p50) if metrics.ttft_p50 is not none else "-" }}</td>
+            <td>{{ "%.3f"|format(metrics.ttft_p95) if metrics.ttft_p95 is not none else "-" }}</td>
+            {% endif %}
+            <td>{{ "%.2f"|format(metrics.avg_load_s) if metrics.avg_load_s is not none else "-" }}</td>
+            <td>{{ "%.0f"|format(avg_tokens[model_temp]) if avg_tokens[model_temp] is not none else "-" }}</td>
+            <td>{{ "%.0f"|format(metrics.avg_prompt_eval_count) if metrics.avg_prompt_eval_count is not none else "-" }}</td>
+            <td>{{ "%.1f"|format(metrics.prefill_tps) if metrics.prefill_tps is not none else "-" }}</td>
+            <td>{{ "%.1f"|format(metrics.decode_tps) if metrics.decode_tps is not none else "-" }}</td>
+        </tr>
+        {% endfor %}
+    </table>
+    
+    {% if scoring %}
+    <h2>Exactitude et Latence</h2>
+    <p>Mode de comparaison : {{ scoring.mode }}{% if scoring.strip_think %}, sections &lt;think&gt; ignorées{% endif %}. Les lignes en gras forment le front de Pareto : aucun autre modèle n'est à la fois plus exact et plus rapide.</p>
+    <table class="summary-table">
+        <tr>
+            <th>Modèle</th>
+            <th>Réponses évaluées</th>
+            <th>Exactitude</th>
+            <th>Temps moyen (s)</th>
+            <th>Pareto</th>
+        </tr>
+        {% for row in scoring.pareto %}
+        <tr{% if row.pareto %} style="font-weight: bold"{% endif %}>
+            <td>{{ row.model }} <span class="temp-badge">temp={{ row.temperature }}</span></td>
+            <td>{{ row.scored }}</td>
+            <td>{{ "%.0f"|format(row.accuracy * 100) }} %</td>
+            <td>{{ "%.2f"|format(row.mean_latency) if row.mean_latency is not none else "-" }}</td>
+            <td>{{ "✔" if row.pareto else "" }}</td>
+        </tr>
+        {% endfor %}
+    </table>
+    {% endif %}
+    
+    {% if diversity %}
+    <h2>Diversité des Réponses</h2>
+    <p>Les réponses d'un même modèle à un même prompt et contexte, toutes graines et températures confondues, sont regroupées quand leur similarité (Jaccard estimée par MinHash) atteint {{ "%.0f"|format(cluster_threshold * 100) }} % ; seul le premier représentant de chaque groupe est affiché en entier, les autres le sont sous forme de différences.</p>
+    <table class="summary-table">
+        <tr>
+            <th>Modèle</th>
+            <th>Réponses</th>
+            <th>Groupes de réponses proches</th>
+            <th>Réponses par groupe</th>
+        </tr>
+        {% for model, counts in diversity.items() %}
+        <tr>
+            <td>{{ model }}</td>
+            <td>{{ counts.responses }}</td>
+            <td>{{ counts.clusters }}</td>
+            <td>{{ "%.1f"|format(counts.responses / counts.clusters) }}</td>
+        </tr>
+        {% endfor %}
+    </table>
+    {% endif %}
+    
+    {% macro stat(value, fmt="%.2f") %}{{ fmt|format(value) if value is not none else "-" }}{% endmacro %}
+    {% if statistics and statistics.groups %}
+    <h2>Analyse Statistique</h2>
+    <table class="summary-table">
+        <tr>
+            <th>Modèle</th>
+            <th>Prompt</th>
+            <th>n</th>
+            <th>Latence moyenne (s)</th>
+            <th>Écart-type (s)</th>
+            <th>p50 (s)</th>
+            <th>p90 (s)</th>
+            <th>p99 (s)</th>
+            <th>IC {{ "%.0f"|format(statistics.confidence * 100) }}% latence (s)</th>
+            <th>Décodage moyen (tokens/s)</th>
+            <th>IC {{ "%.0f"|format(statistics.confidence * 100) }}% décodage</th>
+        </tr>
+        {% for group in statistics.groups %}
+        <tr>
+            <td>{{ group.model }} <span class="temp-badge">temp={{ group.temperature }}</span></td>
+            <td>{{ group.user_prompt_id }}</td>
+            <td>{{ group.latency.n }}</td>
+            <td>{{ stat(group.latency.mean) }}</td>
+            <td>{{ stat(group.latency.std) }}</td>
+            <td>{{ stat(group.latency.p50) }}</td>
+            <td>{{ stat(group.latency.p90) }}</td>
+            <td>{{ stat(group.latency.p99) }}</td>
+            <td>{% if group.latency.ci_low is not none %}[{{ stat(group.latency.ci_low) }} ; {{ stat(group.latency.ci_high) }}]{% else %}-{% endif %}</td>
+            <td>{{ stat(group.tokens_per_s.mean, "%.1f") }}</td>
+            <td>{% if group.tokens_per_s.ci_low is not none %}[{{ stat(group.tokens_per_s.ci_low, "%.1f") }} ; {{ stat(group.tokens_per_s.ci_high, "%.1f") }}]{% else %}-{% endif %}</td>
+        </tr>
+        {% endfor %}
+    </table>
+    {% if statistics.comparisons %}
+    <h3>Comparaison des latences entre modèles</h3>
+    <table class="summary-table">
+        <tr>
+            <th>Température</th>
+            <th>Prompt</th>
+            <th>Modèle A</th>
+            <th>Modèle B</th>
+            <th>Écart A - B (s)</th>
+            <th>IC {{ "%.0f"|format(statistics.confidence * 100) }}% de l'écart (s)</th>
+            <th>Conclusion</th>
+        </tr>
+        {% for comparison in statistics.comparisons %}
+        <tr>
+            <td>{{ comparison.temperature }}</td>
+            <td>{{ comparison.user_prompt_id }}</td>
+            <td>{{ comparison.model_a }}</td>
+            <td>{{ comparison.model_b }}</td>
+            <td>{{ stat(comparison.latency_diff) }}</td>
+            <td>[{{ stat(comparison.ci_low) }} ; {{ stat(comparison.ci_high) }}]</td>
+            <td>{% if comparison.significant %}Différence significative{% else %}<span class="identical">Non significatif</span>{% endif %}</td>
         </tr>
         {% endfor %}
     </table>
+    {% endif %}
+    {% endif %}
+    
+    {% if resource_charts %}
+    <h2>Ressources par Modèle</h2>
+    {% for model, charts in resource_charts.items() %}
+    <div class="system-info">
+        <h3>{{ model }}</h3>
+        <div class="resource-charts">
+            {% for label, chart in charts.items() %}
+            <div class="resource-chart"><strong>{{ label }}</strong><br>{{ chart|safe }}</div>
+            {% endfor %}
+        </div>
+    </div>
+    {% endfor %}
+    {% endif %}
     
     <h2>Données d'Entrée</h2>
     <div class="input-data">
@@ -338,33 +1366,134 @@ HTML_TEMPLATE = r"""
     </div>
     
     <h2>Résultats Détaillés</h2>
+    {% if compact_details %}
+    <div id="compact-details-container"><p class="identical">Chargement des résultats détaillés...</p></div>
+    <script type="text/plain" id="compact-details">{{ compact_details }}</script>
+    <script>
+        // Rapport compact : les tableaux sont décompressés puis construits à l'approche de la zone visible
+        let compactResponses = [];
+        
+        function escapeHtml(text) {
+            return text.replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+        }
+        
+        function renderCompactTable(section, table) {
+            const row = (label, cells) => '<tr><th>' + label + '</th>' + cells.join('') + '</tr>';
+            const responses = table.columns.map(column => {
+                if (column.note) {
+                    return '<td class="response"><div class="response-content identical">' + column.note + '</div></td>';
+                }
+                if (column.diff !== undefined) {
+                    return '<td class="response"><div class="response-content near-duplicate"><span class="identical">'
+                        + column.near + '</span><div class="response-text">' + column.diff + '</div></div></td>';
+                }
+                const text = escapeHtml(compactResponses[column.response])
+                    .replace(/&lt;think&gt;/g, '<span class="think-tag">&lt;think&gt;</span>')
+                    .replace(/&lt;\/think&gt;/g, '<span class="think-tag">&lt;/think&gt;</span>');
+                return '<td class="response">'
+                    + (column.size > 1 ? '<span class="cluster-badge">groupe de ' + column.size + ' réponses proches</span>' : '')
+                    + '<div class="response-content response-text' + (column.correct ? ' highlighted-response' : '')
+                    + '" onclick="showCompactResponse(' + column.response + ', event)">' + text + '</div></td>';
+            });
+            section.innerHTML = '<table class="results-table">'
+                + '<tr class="model-header"><th>Métrique</th>' + table.columns.map(column => '<th>Réponse graine ' + column.seed + '</th>').join('') + '</tr>'
+                + row('Temps (s)', table.columns.map(column => '<td>' + column.time + '</td>'))
+                + row('Prefill', table.columns.map(column => '<td>' + column.prefill + '</td>'))
+                + row('Réponse', responses)
+                + '</table><br>';
+            section.style.minHeight = '';
+        }
+        
+        function showCompactResponse(index, event) {
+            showResponse(JSON.stringify(compactResponses[index]).slice(1, -1), event);
+        }
+        
+        async function loadCompactDetails() {
+            const container = document.getElementById('compact-details-container');
+            if (!('DecompressionStream' in window)) {
+                container.innerHTML = '<p class="identical">Ce navigateur ne sait pas décompresser les résultats détaillés, voir le fichier JSON.</p>';
+                return;
+            }
+            const encoded = document.getElementById('compact-details').textContent.trim();
+            const bytes = Uint8Array.from(atob(encoded), character => character.charCodeAt(0));
+            const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+            const data = await new Response(stream).json();
+            compactResponses = data.responses;
+            const observer = new IntersectionObserver(entries => {
+                for (const entry of entries) {
+                    if (entry.isIntersecting) {
+                        observer.unobserve(entry.target);
+                        renderCompactTable(entry.target, entry.target.compactTable);
+                    }
+                }
+            }, { rootMargin: '{{ compact_render_margin }}' });
+            const fragment = document.createDocumentFragment();
+            for (const table of data.tables) {
+                const title = document.createElement('h3');
+                if (table.anchor) {
+                    title.id = table.anchor;
+                }
+                title.textContent = table.title;
+                const section = document.createElement('div');
+                section.style.minHeight = '200px';
+                section.compactTable = table;
+                fragment.append(title, section);
+                observer.observe(section);
+            }
+            container.replaceChildren(fragment);
+            if (location.hash) {
+                document.getElementById(location.hash.slice(1))?.scrollIntoView();
+            }
+        }
+        
+        loadCompactDetails();
+    </script>
+    {% else %}
     {% for (model, sys_id, prompt_id, ctx_id, temp), seeds in grouped_results.items() %}
+    {% set duplicates = duplicate_seeds[loop.index0] %}
+    {% set near = near_duplicates[loop.index0] %}
+    {% set sizes = cluster_sizes[loop.index0] %}
     {% set model_temp_key = model ~ " (temp=" ~ temp ~ ")" %}
     <h3 id="model_{{ model_temp_first_ids[model_temp_key] }}">Modèle: {{ model }} | Système: {{ sys_id }} | Prompt: {{ prompt_id }} | Contexte: {{ ctx_id }} | Température: {{ temp }}</h3>
     <table class="results-table">
         <tr class="model-header">
             <th>Métrique</th>
-            {% for seed in sorted_seeds %}
+            {% for seed in sorted_seeds if seed in seeds %}
             <th>Réponse graine {{ seed }}</th>
             {% endfor %}
         </tr>
         <tr>
             <th>Temps (s)</th>
-            {% for seed in sorted_seeds %}
-            <td>{{ "%.2f"|format(seeds[seed].response_time) }}</td>
+            {% for seed in sorted_seeds if seed in seeds %}
+            <td>{% if seeds[seed].status in skipped_statuses %}-{% elif seeds[seed].cached %}<span class="identical">(cache)</span>{% else %}{{ "%.2f"|format(seeds[seed].response_time) }}{% if seeds[seed].status == "timeout" %} <span class="identical">(délai dépassé)</span>{% endif %}{% endif %}</td>
+            {% endfor %}
+        </tr>
+        <tr>
+            <th>Prefill</th>
+            {% for seed in sorted_seeds if seed in seeds %}
+            <td>{% if seeds[seed].prompt_eval_count is not none %}{{ seeds[seed].prompt_eval_count }} tokens{% if seeds[seed].prompt_eval_duration %} / {{ "%.3f"|format(seeds[seed].prompt_eval_duration / 1e9) }} s{% endif %}{% else %}-{% endif %}</td>
             {% endfor %}
         </tr>
         <tr>
             <th>Réponse</th>
-            {% for seed in sorted_seeds %}
+            {% for seed in sorted_seeds if seed in seeds %}
             <td class="response">
-                {% if seeds[seed].response in previous_responses %}
+                {% if seeds[seed].status == "converged" %}
+                <div class="response-content identical">(non exécutée, latence stabilisée)</div>
+                {% elif seeds[seed].status == "budget" %}
+                <div class="response-content identical">(non exécutée, budget épuisé)</div>
+                {% elif seed in duplicates or seeds[seed].status == "identical" %}
                 <div class="response-content identical">(identique)</div>
+                {% elif seed in near %}
+                <div class="response-content near-duplicate">
+                    <span class="identical">(proche de la graine {{ near[seed].seed }}{% if near[seed].temperature != temp %} à temp={{ near[seed].temperature }}{% endif %}, similarité {{ "%.0f"|format(near[seed].similarity * 100) }} %)</span>
+                    <div class="response-text">{{ near[seed].diff|safe }}</div>
+                </div>
                 {% else %}
-                <div class="response-content response-text" onclick="showResponse({{ seeds[seed].response|tojson|replace('"', '&quot;')|replace('\n', '\\n')|replace('\r', '')|replace('\\', '\\\\')|safe }}, event)">
+                {% if sizes.get(seed, 1) > 1 %}<span class="cluster-badge">groupe de {{ sizes[seed] }} réponses proches</span>{% endif %}
+                <div class="response-content response-text{% if seeds[seed].correct %} highlighted-response{% endif %}" onclick="showResponse({{ seeds[seed].response|tojson|replace('"', '&quot;')|replace('\n', '\\n')|replace('\r', '')|replace('\\', '\\\\')|safe }}, event)">
                     {{ seeds[seed].response|replace('<think>', '<span class="think-tag">&lt;think&gt;</span>')|replace('</think>', '<span class="think-tag">&lt;/think&gt;</span>')|safe }}
                 </div>
-                {% set _ = previous_responses.append(seeds[seed].response) %}
                 {% endif %}
             </td>
             {% endfor %}
@@ -372,6 +1501,7 @@ HTML_TEMPLATE = r"""
     </table>
     <br>
     {% endfor %}
+    {% endif %}
     
     <h2>Modèles Disponibles</h2>
     <div class="models-list">
@@ -385,19 +1515,88 @@ HTML_TEMPLATE = r"""
 </html>
 """
 
+def ollama_api_get(ollama_url: str, endpoint: str, timeout: float = 5) -> Dict[str, Any]:
+    """Appelle un point d'accès GET de l'API Ollama sans passer par le client Python (plus rapide à importer)."""
+    import urllib.request
+    with urllib.request.urlopen(f"{ollama_url.rstrip('/')}/api/{endpoint}", timeout=timeout) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+def get_ollama_version(ollama_url: str) -> str:
+    """Récupère la version d'un serveur Ollama."""
+    import urllib.error
+    try:
+        return ollama_api_get(ollama_url, "version").get('version', 'Non disponible')
+    except urllib.error.HTTPError as e:
+        logger.warning(f"Erreur lors de la récupération de la version d'Ollama: {e.code}")
+        return "Non disponible"
+    except Exception as e:
+        logger.warning(f"Impossible de récupérer la version d'Ollama: {e}")
+        return "Non disponible"
+
+def probe_static_system_info() -> Dict[str, Any]:
+    """Interroge le système pour les informations qui ne changent pas d'une exécution à l'autre (CPU, GPU, machine)."""
+    import psutil
+    
+    # Récupération des informations CPU
+    cpu_freq = psutil.cpu_freq()
+    cpu_info = {
+        "model": platform.processor(),
+        "cores": psutil.cpu_count(),
+        "threads": psutil.cpu_count(logical=True),
+        "freq": cpu_freq._asdict() if cpu_freq else None
+    }
+    
+    # Récupération des informations GPU (GPUtil appelle nvidia-smi, c'est la partie la plus lente)
+    gpu_info = []
+    try:
+        import GPUtil
+        gpus = GPUtil.getGPUs()
+        gpu_info = [{
+            "name": gpu.name,
+            "memory_total": gpu.memoryTotal,
+            "memory_used": gpu.memoryUsed,
+            "memory_free": gpu.memoryFree,
+            "gpu_load": gpu.load * 100
+        } for gpu in gpus]
+    except (ImportError, RuntimeError) as e:
+        logger.warning(f"Impossible de récupérer les informations GPU: {e}")
+    
+    return {"cpu": cpu_info, "gpu": gpu_info, "hostname": platform.node()}
+
+def get_static_system_info(ttl: float = SYSTEM_INFO_CACHE_TTL) -> Dict[str, Any]:
+    """Renvoie les informations système statiques, depuis le cache disque si elles ont moins de ttl secondes.
+    
+    Seuls le nom et la mémoire totale des GPU sont conservés en cache : l'occupation des GPU
+    n'est disponible qu'après une interrogation complète. Les entrées GPU ont toujours les mêmes clés,
+    les champs d'occupation valent None quand les informations viennent du cache.
+    """
+    try:
+        cached = json.loads(SYSTEM_INFO_CACHE_FILE.read_text(encoding='utf-8'))
+        if time.time() - cached["probed_at"] < ttl and cached["hostname"] == platform.node():
+            cached["gpu"] = [{**gpu, **dict.fromkeys(DYNAMIC_GPU_FIELDS)} for gpu in cached["gpu"]]
+            return cached
+    except (OSError, ValueError, KeyError):
+        pass
+    
+    info = probe_static_system_info()
+    try:
+        SYSTEM_INFO_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        SYSTEM_INFO_CACHE_FILE.write_text(json.dumps({
+            **info,
+            "gpu": [{field: gpu[field] for field in STATIC_GPU_FIELDS} for gpu in info["gpu"]],
+            "probed_at": time.time()
+        }, ensure_ascii=False), encoding='utf-8')
+    except OSError as e:
+        logger.debug(f"Impossible d'écrire le cache des informations système: {e}")
+    return info
+
 def get_system_info(ollama_url: str = DEFAULT_OLLAMA_URL) -> SystemInfo:
     """Récupère les informations système détaillées."""
     try:
-        # Récupération des informations CPU
-        cpu_freq = psutil.cpu_freq()
-        cpu_info = {
-            "model": platform.processor(),
-            "cores": psutil.cpu_count(),
-            "threads": psutil.cpu_count(logical=True),
-            "freq": cpu_freq._asdict() if cpu_freq else None
-        }
+        import psutil
+        static_info = get_static_system_info()
         
-        # Récupération des informations mémoire
+        # Récupération des informations mémoire (toujours à jour, l'appel est peu coûteux)
         memory = psutil.virtual_memory()
         memory_info = {
             "total_gb": memory.total / GB_DIVISOR,
@@ -406,30 +1605,8 @@ def get_system_info(ollama_url: str = DEFAULT_OLLAMA_URL) -> SystemInfo:
             "percent": memory.percent
         }
         
-        # Récupération des informations GPU
-        gpu_info = []
-        try:
-            gpus = GPUtil.getGPUs()
-            gpu_info = [{
-                "name": gpu.name,
-                "memory_total": gpu.memoryTotal,
-                "memory_used": gpu.memoryUsed,
-                "memory_free": gpu.memoryFree,
-                "gpu_load": gpu.load * 100
-            } for gpu in gpus]
-        except (ImportError, RuntimeError) as e:
-            logger.warning(f"Impossible de récupérer les informations GPU: {e}")
-        
         # Récupération de la version d'Ollama
-        try:
-            api_url = f"{ollama_url}/api/version"
-            response = requests.get(api_url, timeout=5)
-            ollama_version = response.json().get('version', 'Non disponible') if response.status_code == 200 else "Non disponible"
-            if response.status_code != 200:
-                logger.warning(f"Erreur lors de la récupération de la version d'Ollama: {response.status_code}")
-        except Exception as e:
-            logger.warning(f"Impossible de récupérer la version d'Ollama: {e}")
-            ollama_version = "Non disponible"
+        ollama_version = get_ollama_version(ollama_url)
         
         return SystemInfo(
             os=platform.system(),
@@ -437,10 +1614,10 @@ def get_system_info(ollama_url: str = DEFAULT_OLLAMA_URL) -> SystemInfo:
             python_version=sys.version,
             ollama_version=ollama_version,
             evallm_version=EVALLM_VERSION,
-            cpu=cpu_info,
+            cpu=static_info["cpu"],
             memory=memory_info,
-            gpu=gpu_info,
-            hostname=platform.node()
+            gpu=static_info["gpu"],
+            hostname=static_info["hostname"]
         )
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des informations système: {e}")
@@ -457,180 +1634,1086 @@ def read_content_from_file_if_exists(content: str) -> str:
             return content
     return content
 
-def warmup_model(model: str, system_prompt: str, user_prompt: str, context: str = "") -> None:
-    """Préchauffage du modèle avec une graine 0."""
-    logger.info(f"Préchauffage du modèle {model}...")
-    full_prompt = f"{context}\n\n{user_prompt}" if context else user_prompt
-    try:
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": full_prompt}
-        ]
-        for _ in range(1):
-            ollama.chat(
-                model=model,
-                messages=messages,
-                options={"seed": 0, "temperature": 0.0}
-            )
-            time.sleep(0.5)
-        logger.info(f"Préchauffage réussi pour {model}")
-    except Exception as e:
-        logger.warning(f"Avertissement lors du préchauffage de {model}: {e}")
-
-def compare_llms(config_file: str, output_file: Optional[str] = None, ollama_url: str = DEFAULT_OLLAMA_URL) -> List[Result]:
-    """Compare différents LLM en utilisant Ollama selon la configuration spécifiée."""
-    logger.info(f"Chargement de la configuration depuis {config_file}")
-    logger.info(f"Utilisation du serveur Ollama: {ollama_url}")
+class TextSource:
+    """Prompts utilisateur ou contextes lus à la demande depuis un répertoire ou un fichier JSONL.
     
-    # Vérification du fichier de configuration
-    config_path = Path(config_file)
-    if not config_path.exists():
-        logger.error(f"Le fichier de configuration {config_file} n'existe pas")
-        return []
+    Répertoire : un texte par fichier (fichiers cachés exclus), identifié par son chemin relatif
+    sans extension. JSONL : un objet par ligne avec "id" (numéro de ligne par défaut) et "text"
+    (ou "content"). Les textes ne sont lus qu'au moment où les itérations qui les utilisent sont
+    produites, et len() compte les entrées sans lire leur contenu. Les textes relus à chaque passage
+    de la boucle externe sont internés : itérations et résultats partagent un seul objet par texte.
+    """
     
-    try:
-        # Chargement de la configuration
-        with open(config_file, 'r', encoding='utf-8') as f:
-            config_data = json_repair.load(f)
-        config = ModelConfig(**config_data)
-    except Exception as e:
-        logger.error(f"Erreur lors du chargement de la configuration: {e}")
-        return []
+    def __init__(self, path: str):
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Source de textes introuvable: {path}")
     
-    # Validation de la configuration
-    if not all([config.models, config.system_prompts, config.user_prompts]):
-        logger.error("Configuration invalide: modèles, prompts système ou prompts utilisateur manquants")
-        return []
+    def _files(self) -> List[Path]:
+        return [file for file in sorted(self.path.rglob("*")) if file.is_file()
+                and not any(part.startswith(".") for part in file.relative_to(self.path).parts)]
     
-    # Détermination du nom du fichier de sortie
-    base_name = config_path.stem
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = f"{base_name}_{timestamp}.html"
-    logger.info(f"Fichier de sortie : {output_file}")
+    def __len__(self) -> int:
+        if self.path.is_dir():
+            return len(self._files())
+        with open(self.path, 'rb') as f:
+            return sum(1 for line in f if line.strip())
     
-    # Récupération des informations système
-    system_info = get_system_info(ollama_url)
+    def keys(self) -> Iterator[str]:
+        if self.path.is_dir():
+            return (file.relative_to(self.path).with_suffix("").as_posix() for file in self._files())
+        return (key for key, _ in self.items())
     
-    # Initialisation du fichier JSON
-    json_output = Path(output_file).with_suffix('.json')
-    json_output.write_text(json.dumps({
-        "system_info": system_info.__dict__,
-        "config": config.model_dump(),
-        "results": []
-    }, indent=2, ensure_ascii=False), encoding='utf-8')
+    def items(self) -> Iterator[tuple]:
+        if self.path.is_dir():
+            for file in self._files():
+                yield (sys.intern(file.relative_to(self.path).with_suffix("").as_posix()),
+                       sys.intern(file.read_text(encoding='utf-8')))
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                if line.strip():
+                    record = json.loads(line)
+                    yield sys.intern(str(record.get("id", number))), sys.intern(record.get("text", record.get("content", "")))
+
+def open_text_source(value: Union[Dict[str, str], str]) -> Union[Dict[str, str], TextSource]:
+    """Prépare les prompts utilisateur ou contextes d'une configuration.
     
-    # Traitement des fichiers pour les prompts
-    system_prompts = {k: read_content_from_file_if_exists(v) for k, v in config.system_prompts.items()}
-    user_prompts = {k: read_content_from_file_if_exists(v) for k, v in config.user_prompts.items()}
-    contexts = {k: read_content_from_file_if_exists(v) for k, v in config.contexts.items()}
+    Un dictionnaire est lu immédiatement (valeurs éventuellement remplacées par le contenu du
+    fichier qu'elles désignent) ; un chemin de répertoire ou de fichier JSONL devient une TextSource.
+    """
+    if isinstance(value, dict):
+        return {k: read_content_from_file_if_exists(v) for k, v in value.items()}
+    return TextSource(value)
+
+def content_hash(text: str) -> str:
+    """Empreinte SHA-256 d'un texte, utilisée pour vérifier que les prompts n'ont pas changé."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def iteration_key(item: Any) -> tuple:
+    """Clé identifiant une itération (ou un résultat) dans la matrice de comparaison."""
+    return (item.model, item.system_prompt_id, item.user_prompt_id, item.context_id, item.seed, float(item.temperature))
+
+def iter_model_iterations(model: str, system_prompts: Dict[str, str], user_prompts: Union[Dict[str, str], TextSource],
+                          contexts: Union[Dict[str, str], TextSource], config: ModelConfig,
+                          context_first: bool = False) -> Iterator[Iteration]:
+    """Parcourt les itérations d'un modèle, sans matérialiser le produit cartésien.
     
-    logger.info(f"Configuration chargée : {len(config.models)} modèles, {len(system_prompts)} prompts système, "
-                f"{len(user_prompts)} prompts utilisateur, {len(contexts)} contextes")
+    Les sources de textes (TextSource) sont relues en flux à chaque passage de la boucle externe ;
+    leurs textes étant internés, un même contexte reste un seul objet d'un passage à l'autre.
+    Par défaut l'ordre historique des boucles est conservé. Avec context_first, les contextes
+    sont parcourus avant les prompts utilisateur pour que les requêtes partageant le même
+    préfixe système + contexte s'enchaînent et profitent du cache KV d'Ollama.
+    """
+    for sys_id, system_prompt in system_prompts.items():
+        if context_first:
+            pairs = ((p, c) for c in contexts.items() for p in user_prompts.items())
+        else:
+            pairs = ((p, c) for p in user_prompts.items() for c in contexts.items())
+        for (prompt_id, user_prompt), (ctx_id, context) in pairs:
+            for seed in config.seeds:
+                for temperature in config.temperatures:
+                    yield Iteration(model, sys_id, system_prompt, prompt_id, user_prompt, ctx_id, context, seed, temperature)
+
+def read_result_log(path: Path) -> List[Dict[str, Any]]:
+    """Lit un journal JSONL en ignorant une éventuelle dernière ligne tronquée."""
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Ligne {line_number} illisible dans {path}, ignorée")
+    return records
+
+def text_ref(text: str) -> str:
+    """Référence courte d'un texte dans les tables du schéma normalisé."""
+    return content_hash(text)[:16]
+
+def build_results_payload(system_info: Optional[SystemInfo], config: ModelConfig, results: List[Result],
+                          schema_version: int = 1, extras: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Construit le contenu du fichier JSON de résultats.
     
-    # Vérification des modèles disponibles
-    try:
-        # Configuration de l'URL d'Ollama
-        ollama.base_url = ollama_url
-        available_models = [model.model for model in ollama.list().models]
-        for model in config.models:
-            if model not in available_models:
-                logger.warning(f"Le modèle '{model}' n'est pas disponible. Utilisez 'ollama pull {model}' pour le télécharger.")
-    except Exception as e:
-        logger.error(f"Erreur lors de la vérification des modèles: {e}")
-        logger.error("Assurez-vous qu'Ollama est installé et en cours d'exécution.")
-        return []
+    La version 1 répète tous les textes dans chaque résultat (format historique). La version 2
+    stocke une seule fois les prompts, contextes, commentaires et réponses identiques dans des
+    tables indexées par empreinte, les résultats n'en gardant que les références.
+    extras ajoute des sections calculées après l'exécution (statistiques, score...).
+    """
+    system_info_data = system_info.__dict__ if system_info else None
+    extra = {key: value for key, value in (extras or {}).items() if value is not None}
+    if schema_version == 1:
+        return {
+            "system_info": system_info_data,
+            "config": config.model_dump(),
+            "results": [result.model_dump() for result in results],
+            **extra
+        }
     
-    # Calcul du nombre total d'itérations
-    total_iterations = len(config.models) * len(system_prompts) * len(user_prompts) * len(contexts) * len(config.seeds) * len(config.temperatures)
-    logger.info(f"Nombre total d'itérations à effectuer : {total_iterations}")
+    texts = {}
+    lists = {}
+    normalized = []
+    for result in results:
+        # Les champs absents valent None au rechargement, inutile de les écrire
+        record = result.model_dump(exclude_none=True)
+        refs = {}
+        for field in NORMALIZED_TEXT_FIELDS:
+            text = record.pop(field)
+            refs[field] = text_ref(text)
+            texts.setdefault(refs[field], text)
+        expected = record.pop("Resultats", None)
+        if expected is not None:
+            refs["Resultats"] = text_ref(json.dumps(expected, ensure_ascii=False))
+            lists.setdefault(refs["Resultats"], expected)
+        record["refs"] = refs
+        normalized.append(record)
+    return {
+        "schema_version": schema_version,
+        "system_info": system_info_data,
+        "config": config.model_dump(),
+        "texts": texts,
+        "lists": lists,
+        "results": normalized,
+        **extra
+    }
+
+def result_from_record(record: Dict[str, Any]) -> Result:
+    """Construit un Result depuis un enregistrement JSON, y compris ceux des premières versions sans commentaire.
+    
+    Les textes répétés d'un enregistrement à l'autre (prompts, contextes, réponses identiques) sont
+    internés pour n'être gardés qu'une fois en mémoire.
+    """
+    record = dict(record)
+    record.setdefault("commentaire", "")
+    for field in NORMALIZED_TEXT_FIELDS:
+        if isinstance(record.get(field), str):
+            record[field] = sys.intern(record[field])
+    return Result(**record)
+
+def expand_results_payload(data: Union[Dict[str, Any], List[Dict[str, Any]]]) -> List[Result]:
+    """Reconstruit les Result d'un fichier JSON, quel que soit son format (liste historique, version 1 ou 2)."""
+    if isinstance(data, list):
+        return [result_from_record(record) for record in data]
+    
+    if data.get("schema_version", 1) == 1:
+        return [result_from_record(record) for record in data.get("results", [])]
     
+    texts = data.get("texts", {})
+    lists = data.get("lists", {})
     results = []
-    current_model = None
+    for record in data.get("results", []):
+        record = dict(record)
+        refs = record.pop("refs")
+        for field in NORMALIZED_TEXT_FIELDS:
+            record[field] = texts[refs[field]]
+        record["Resultats"] = lists[refs["Resultats"]] if "Resultats" in refs else None
+        results.append(result_from_record(record))
+    return results
+
+def load_results_file(path: str) -> Dict[str, Any]:
+    """Charge un fichier de résultats (JSON de toute version ou journal JSONL).
     
-    with Progress(*progress_columns, console=console) as progress:
-        task = progress.add_task("Génération des réponses...", total=total_iterations)
-        
-        for model in config.models:
-            if current_model != model:
-                logger.info(f"Changement de modèle : passage à {model}")
-                first_sys_prompt = next(iter(system_prompts.values()))
-                first_user_prompt = next(iter(user_prompts.values()))
-                first_context = next(iter(contexts.values()))
-                warmup_model(model, first_sys_prompt, first_user_prompt, first_context)
-                current_model = model
+    Renvoie un dictionnaire avec system_info et config (None si absents), la liste des Result et
+    les sections calculées en fin d'exécution (extras, voir RESULT_EXTRAS).
+    Pour une exécution interrompue, les résultats sont lus dans le journal JSONL voisin.
+    """
+    results_path = Path(path)
+    if results_path.suffix == '.jsonl':
+        return {"system_info": None, "config": None, "extras": {},
+                "results": [result_from_record(record) for record in read_result_log(results_path)]}
+    
+    data = json.loads(results_path.read_text(encoding='utf-8'))
+    results = expand_results_payload(data)
+    
+    # Une exécution interrompue n'a que l'en-tête dans le JSON, les résultats sont dans le journal
+    log_path = results_path.with_suffix('.jsonl')
+    if log_path.exists():
+        logged = read_result_log(log_path)
+        if len(logged) > len(results):
+            results = [result_from_record(record) for record in logged]
+    
+    header = data if isinstance(data, dict) else {}
+    return {"system_info": header.get("system_info"), "config": header.get("config"), "results": results,
+            "extras": {key: header[key] for key in RESULT_EXTRAS if header.get(key) is not None}}
+
+def load_resumable_results(path: str, system_prompts: Dict[str, str], user_prompts: Union[Dict[str, str], TextSource],
+                           contexts: Union[Dict[str, str], TextSource]) -> Dict[tuple, Result]:
+    """Indexe les résultats réutilisables d'une exécution précédente.
+    
+    Les erreurs, les réponses tronquées par le délai (status "timeout") et les résultats dont un
+    prompt ou un contexte a changé depuis sont écartés afin d'être régénérés. Les itérations
+    ignorées par l'arrêt anticipé ou le budget ne sont pas reprises.
+    """
+    current_hashes = {
+        "system_prompt": {k: content_hash(v) for k, v in system_prompts.items()},
+        "user_prompt": {k: content_hash(v) for k, v in user_prompts.items()},
+        "context": {k: content_hash(v) for k, v in contexts.items()},
+    }
+    
+    resumed = {}
+    changed = errors = 0
+    for result in load_results_file(path)["results"]:
+        if result.response.startswith("ERREUR:") or result.status == "timeout":
+            errors += 1
+            continue
+        # L'arrêt anticipé est réévalué à partir des réponses effectivement générées
+        if result.status in SKIPPED_STATUSES:
+            continue
+        if any(
+            current_hashes[field].get(getattr(result, f"{field}_id")) != content_hash(getattr(result, field))
+            for field in current_hashes
+        ):
+            changed += 1
+            continue
+        resumed[iteration_key(result)] = result
+    
+    logger.info(f"Reprise depuis {path} : {len(resumed)} résultats réutilisables")
+    if changed:
+        logger.warning(f"{changed} résultats ignorés car leurs prompts ou contextes ont changé")
+    if errors:
+        logger.info(f"{errors} résultats en erreur ou interrompus par le délai seront regénérés")
+    return resumed
+
+def load_model(host: OllamaHost, model: str) -> Optional[Dict[str, Any]]:
+    """Charge le modèle en mémoire sans rien générer et mesure son temps de chargement.
+    
+    Le chargement n'est « à froid » que si le modèle n'était pas déjà en mémoire sur le serveur.
+    """
+    already_loaded = model in host.loaded_models
+    logger.info(f"Chargement du modèle {model} sur {host.url}...")
+    start = time.time()
+    try:
+        # Un prompt vide charge le modèle sans lancer de génération
+        with tracer.span("load_model", model=model, host=host.url):
+            response = host.lifecycle_client.generate(model=model, prompt="", keep_alive=MODEL_KEEP_ALIVE)
+    except Exception as e:
+        logger.warning(f"Avertissement lors du chargement de {model}: {e}")
+        return None
+    wall_time = time.time() - start
+    host.loaded_models.add(model)
+    load_duration = response.get("load_duration")
+    load_time = load_duration / NS_PER_S if load_duration else wall_time
+    logger.info(f"Modèle {model} chargé en {load_time:.2f} s" + (" (déjà en mémoire)" if already_loaded else ""))
+    return {"model": model, "host": host.url, "load_time": load_time, "wall_time": wall_time,
+            "already_loaded": already_loaded}
+
+def unload_model(host: OllamaHost, model: str) -> None:
+    """Décharge le modèle de la mémoire du serveur (keep_alive à 0)."""
+    logger.info(f"Déchargement du modèle {model} sur {host.url}")
+    try:
+        with tracer.span("unload_model", model=model, host=host.url):
+            host.lifecycle_client.generate(model=model, prompt="", keep_alive=0)
+        host.loaded_models.discard(model)
+    except Exception as e:
+        logger.warning(f"Avertissement lors du déchargement de {model}: {e}")
+
+def build_messages(iteration: Iteration, context_first: bool = False) -> List[Dict[str, str]]:
+    """Construit les messages envoyés au modèle pour une itération.
+    
+    Avec context_first, le contexte (souvent long et partagé) précède le prompt utilisateur afin
+    que le serveur puisse réutiliser le prefill du préfixe commun d'une requête à l'autre.
+    """
+    if not iteration.context:
+        full_prompt = iteration.user_prompt
+    elif context_first:
+        full_prompt = f"{iteration.context}\n\n{iteration.user_prompt}"
+    else:
+        full_prompt = f"{iteration.user_prompt}\n\n{iteration.context}"
+    return [
+        {"role": "system", "content": iteration.system_prompt},
+        {"role": "user", "content": full_prompt}
+    ]
+
+def build_options(iteration: Iteration, num_predict: Optional[int] = None) -> Dict[str, Any]:
+    """Construit les options de génération pour une itération."""
+    options = {
+        "seed": iteration.seed if iteration.seed is not None else None,
+        "temperature": iteration.temperature
+    }
+    if num_predict is not None:
+        options["num_predict"] = num_predict
+    return options
+
+def extract_server_metrics(response: Any) -> Dict[str, Optional[int]]:
+    """Extrait les durées et compteurs de tokens d'une réponse d'ollama.chat."""
+    return {name: response.get(name) for name in SERVER_METRICS}
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Percentile q (0-100) par interpolation linéaire, None si la liste est vide."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def stream_chat(client: Any, model: str, messages: List[Dict[str, str]], options: Dict[str, Any],
+                deadline: Optional[float] = None) -> tuple:
+    """Génère une réponse en streaming et mesure le temps jusqu'au premier token et les écarts entre tokens.
+    
+    Si deadline (horodatage time.time()) est dépassé, le flux est fermé, ce qui interrompt la
+    génération côté serveur, et la réponse partielle est conservée.
+    Renvoie le texte, les compteurs serveur (portés par le dernier fragment), les mesures de
+    streaming et un booléen indiquant si le délai a interrompu la génération.
+    """
+    start = time.perf_counter()
+    parts = []
+    token_times = []
+    metrics = {}
+    timed_out = False
+    stream = client.chat(model=model, messages=messages, options=options, stream=True)
+    try:
+        for chunk in stream:
+            content = chunk["message"]["content"]
+            if content:
+                token_times.append(time.perf_counter())
+                parts.append(content)
+            if chunk.get("done"):
+                metrics = extract_server_metrics(chunk)
+            elif deadline is not None and time.time() >= deadline:
+                timed_out = True
+                break
+    except Exception:
+        # Délai de lecture HTTP atteint (serveur muet) : même traitement qu'un dépassement entre deux fragments
+        if deadline is None or time.time() < deadline:
+            raise
+        timed_out = True
+    finally:
+        if hasattr(stream, "close"):
+            stream.close()
+    
+    gaps = [b - a for a, b in zip(token_times, token_times[1:])]
+    decode_span = token_times[-1] - token_times[0] if len(token_times) > 1 else 0
+    stream_metrics = {
+        "ttft": token_times[0] - start if token_times else None,
+        "inter_token_p50": percentile(gaps, 50),
+        "inter_token_p95": percentile(gaps, 95),
+        "inter_token_max": max(gaps) if gaps else None,
+        "stream_tokens_per_s": (len(token_times) - 1) / decode_span if decode_span > 0 else None,
+    }
+    return "".join(parts), metrics, stream_metrics, timed_out
+
+def is_measured(result: Result) -> bool:
+    """Le temps de réponse est-il une mesure de latence (ni lu depuis le cache, ni interrompu, ni ignoré) ?"""
+    return not result.cached and result.status is None
+
+def summarize_server_metrics(results: List[Result]) -> Dict[str, Dict[str, Optional[float]]]:
+    """Agrège les compteurs serveur par modèle et température.
+    
+    Les débits de prefill et de décodage sont calculés sur les cumuls (tokens / durée totale)
+    afin que les réponses longues pèsent proportionnellement. Les résultats lus depuis le cache
+    ne comptent que pour le nombre de tokens.
+    """
+    totals = {}
+    for result in results:
+        key = f"{result.model} (temp={result.temperature})"
+        acc = totals.setdefault(key, {"tokens": [], "loads": [], "ttfts": [], "prefills": [], "prompt_count": 0,
+                                      "prompt_ns": 0, "eval_count": 0, "eval_ns": 0})
+        if result.eval_count is not None:
+            acc["tokens"].append(result.eval_count)
+        if not is_measured(result):
+            continue
+        if result.load_duration is not None:
+            acc["loads"].append(result.load_duration / NS_PER_S)
+        if result.ttft is not None:
+            acc["ttfts"].append(result.ttft)
+        if result.prompt_eval_count is not None:
+            acc["prefills"].append(result.prompt_eval_count)
+        if result.prompt_eval_count and result.prompt_eval_duration:
+            acc["prompt_count"] += result.prompt_eval_count
+            acc["prompt_ns"] += result.prompt_eval_duration
+        if result.eval_count and result.eval_duration:
+            acc["eval_count"] += result.eval_count
+            acc["eval_ns"] += result.eval_duration
+    
+    return {
+        key: {
+            "avg_tokens": sum(acc["tokens"]) / len(acc["tokens"]) if acc["tokens"] else None,
+            "avg_load_s": sum(acc["loads"]) / len(acc["loads"]) if acc["loads"] else None,
+            "avg_prompt_eval_count": sum(acc["prefills"]) / len(acc["prefills"]) if acc["prefills"] else None,
+            "prefill_tps": acc["prompt_count"] / (acc["prompt_ns"] / NS_PER_S) if acc["prompt_ns"] else None,
+            "decode_tps": acc["eval_count"] / (acc["eval_ns"] / NS_PER_S) if acc["eval_ns"] else None,
+            "ttft_p50": percentile(acc["ttfts"], 50),
+            "ttft_p95": percentile(acc["ttfts"], 95),
+        }
+        for key, acc in totals.items()
+    }
+
+def summarize_hosts(results: List[Result], hosts: List[Dict[str, Any]], run_duration: float) -> List[Dict[str, Any]]:
+    """Complète les informations de chaque serveur avec son activité pendant l'exécution.
+    
+    results ne doit contenir que les résultats générés pendant cette exécution (ni repris, ni lus
+    depuis le cache) : les débits sont rapportés à sa durée. Le temps de réponse moyen ne porte que
+    sur les appels mesurés et réussis, les erreurs rapides et les délais écrêtés le fausseraient.
+    """
+    summary = []
+    for host in hosts:
+        served = [r for r in results if r.host == host["url"]]
+        errors = sum(1 for r in served if r.response.startswith("ERREUR:"))
+        timed = [r.response_time for r in served if is_measured(r) and not r.response.startswith("ERREUR:")]
+        tokens = sum(r.eval_count or 0 for r in served)
+        eval_ns = sum(r.eval_duration or 0 for r in served if r.eval_count)
+        summary.append({
+            **host,
+            "requests": len(served),
+            "errors": errors,
+            "avg_response_time": sum(timed) / len(timed) if timed else None,
+            "requests_per_s": len(served) / run_duration if run_duration > 0 else None,
+            "tokens_per_s": tokens / run_duration if run_duration > 0 else None,
+            "decode_tps": tokens / (eval_ns / NS_PER_S) if eval_ns else None,
+        })
+    return summary
+
+def svg_line_chart(values: List[Optional[float]], width: int = 260, height: int = 70) -> str:
+    """Dessine une courbe SVG minimale (valeurs manquantes ignorées) avec son maximum en légende."""
+    points = [(i, v) for i, v in enumerate(values) if v is not None]
+    if not points:
+        return ""
+    top = max(v for _, v in points) or 1
+    step = (width - 10) / max(len(values) - 1, 1)
+    coords = " ".join(f"{5 + i * step:.1f},{height - 15 - (v / top) * (height - 25):.1f}" for i, v in points)
+    return (
+        f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+        f'<polyline fill="none" stroke="#3f51b5" stroke-width="1.5" points="{coords}"/>'
+        f'<text x="5" y="{height - 2}" font-size="10" fill="#5c6bc0">max {top:.1f}</text>'
+        f'</svg>'
+    )
+
+def build_resource_charts(results: List[Result]) -> Dict[str, Dict[str, str]]:
+    """Construit, pour chaque modèle, une courbe par indicateur de ressources (un point par résultat)."""
+    series = {}
+    for result in results:
+        if not result.resources:
+            continue
+        model_series = series.setdefault(result.model, {metric: [] for metric in RESOURCE_METRICS})
+        for metric in RESOURCE_METRICS:
+            model_series[metric].append(result.resources.get(metric))
+    charts = {}
+    for model, model_series in series.items():
+        charts[model] = {}
+        for metric, values in model_series.items():
+            chart = svg_line_chart(values)
+            if chart:
+                charts[model][RESOURCE_METRICS[metric][0]] = chart
+    return charts
+
+def describe_sample(np: Any, values: Any, rng: Any, n_boot: int, confidence: float) -> Dict[str, Any]:
+    """Statistiques descriptives d'un échantillon et intervalle de confiance bootstrap de sa moyenne."""
+    stats = {"n": int(values.size), "mean": None, "std": None, "ci_low": None, "ci_high": None}
+    stats.update({f"p{q}": None for q in STATS_PERCENTILES})
+    if values.size == 0:
+        return stats
+    stats["mean"] = float(values.mean())
+    stats.update({f"p{q}": float(v) for q, v in zip(STATS_PERCENTILES, np.percentile(values, STATS_PERCENTILES))})
+    if values.size > 1:
+        stats["std"] = float(values.std(ddof=1))
+        boot_means = values[rng.integers(0, values.size, size=(n_boot, values.size))].mean(axis=1)
+        alpha = (1 - confidence) / 2 * 100
+        stats["ci_low"], stats["ci_high"] = (float(v) for v in np.percentile(boot_means, [alpha, 100 - alpha]))
+    return stats
+
+def compute_statistics(results: List[Result], n_boot: int = STATS_BOOTSTRAP_SAMPLES,
+                       confidence: float = STATS_CONFIDENCE, seed: int = 0) -> Optional[Dict[str, Any]]:
+    """Calcule percentiles, écart-type et intervalles de confiance bootstrap par modèle, température et prompt.
+    
+    La latence et le débit de décodage (tokens/s) sont analysés ; les réponses en cache et les
+    erreurs sont exclues. Pour chaque température et prompt, les modèles sont comparés deux à deux :
+    une différence de latence moyenne est jugée significative si l'intervalle de confiance bootstrap
+    de la différence n'inclut pas zéro. Le générateur aléatoire est initialisé pour que les
+    résultats soient reproductibles. Renvoie None si NumPy n'est pas installé.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        logger.warning("NumPy indisponible, l'analyse statistique est ignorée")
+        return None
+    
+    rng = np.random.default_rng(seed)
+    samples = {}
+    for result in results:
+        if not is_measured(result) or result.response.startswith("ERREUR:"):
+            continue
+        key = (result.model, result.temperature, result.user_prompt_id)
+        latencies, throughputs = samples.setdefault(key, ([], []))
+        latencies.append(result.response_time)
+        if result.eval_count and result.eval_duration:
+            throughputs.append(result.eval_count / (result.eval_duration / NS_PER_S))
+    
+    groups = []
+    boot_latency_means = {}
+    for (model, temperature, prompt_id), (latencies, throughputs) in samples.items():
+        latency = np.asarray(latencies, dtype=float)
+        groups.append({
+            "model": model,
+            "temperature": temperature,
+            "user_prompt_id": prompt_id,
+            "latency": describe_sample(np, latency, rng, n_boot, confidence),
+            "tokens_per_s": describe_sample(np, np.asarray(throughputs, dtype=float), rng, n_boot, confidence),
+        })
+        if latency.size > 1:
+            boot_latency_means[(model, temperature, prompt_id)] = \
+                latency[rng.integers(0, latency.size, size=(n_boot, latency.size))].mean(axis=1)
+    
+    comparisons = []
+    alpha = (1 - confidence) / 2 * 100
+    keys = list(boot_latency_means)
+    for i, key_a in enumerate(keys):
+        for key_b in keys[i + 1:]:
+            if key_a[1:] != key_b[1:] or key_a[0] == key_b[0]:
+                continue
+            diff = boot_latency_means[key_a] - boot_latency_means[key_b]
+            low, high = (float(v) for v in np.percentile(diff, [alpha, 100 - alpha]))
+            comparisons.append({
+                "temperature": key_a[1],
+                "user_prompt_id": key_a[2],
+                "model_a": key_a[0],
+                "model_b": key_b[0],
+                "latency_diff": float(np.mean(samples[key_a][0]) - np.mean(samples[key_b][0])),
+                "ci_low": low,
+                "ci_high": high,
+                "significant": bool(low > 0 or high < 0),
+            })
+    
+    return {"confidence": confidence, "bootstrap_samples": n_boot, "groups": groups, "comparisons": comparisons}
+
+def normalize_answer(text: str) -> str:
+    """Minuscules, sans accents, ponctuation remplacée par des espaces et espaces regroupés."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^\w/.:-]+", " ", text).split())
+
+def extract_dates(text: str) -> set:
+    """Extrait les dates d'un texte au format ISO (AAAA-MM-JJ), années sur deux chiffres comprises."""
+    text = normalize_answer(text)
+    dates = set()
+    for pattern, fields in DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            parts = dict(zip(fields, match.groups()))
+            month = FRENCH_MONTHS.get(parts["month"]) or int(parts["month"])
+            year = int(parts["year"])
+            if len(parts["year"]) == 2:
+                year += 1900 if year >= 50 else 2000
+            try:
+                dates.add(datetime(year, month, int(parts["day"])).strftime("%Y-%m-%d"))
+            except ValueError:
+                continue
+    return dates
+
+class AnswerMatcher:
+    """Compare les réponses aux réponses attendues (resultats), compilées une seule fois.
+    
+    Modes :
+    - exact : la réponse (sans espaces en bordure) est identique à une réponse attendue ;
+    - normalized : une réponse attendue apparaît dans la réponse, après passage en minuscules,
+      suppression des accents et de la ponctuation ;
+    - regex : les réponses attendues sont des expressions régulières recherchées dans la réponse ;
+    - date : une date de la réponse correspond à une date attendue, quel que soit son format
+      (JJ/MM/AAAA, JJ/MM/AA, AAAA-MM-JJ, « 9 septembre 1999 »...).
+    Les sections <think> sont retirées avant comparaison si strip_think est vrai.
+    """
+    
+    def __init__(self, expected: List[str], mode: str = "normalized", strip_think: bool = True):
+        if mode not in SCORE_MODES:
+            raise ValueError(f"Mode de score inconnu: {mode} (attendu: {', '.join(SCORE_MODES)})")
+        self.mode = mode
+        self.strip_think = strip_think
+        if mode == "exact":
+            self._expected = {answer.strip() for answer in expected}
+        elif mode == "normalized":
+            self._patterns = [re.compile(r"(?<!\w)" + re.escape(normalize_answer(answer)) + r"(?!\w)")
+                              for answer in expected]
+        elif mode == "regex":
+            self._patterns = [re.compile(answer) for answer in expected]
+        else:
+            self._expected = set().union(*(extract_dates(answer) for answer in expected))
+    
+    def matches(self, response: str) -> bool:
+        if self.strip_think:
+            response = THINK_SECTION_RE.sub("", response)
+        if self.mode == "exact":
+            return response.strip() in self._expected
+        if self.mode == "normalized":
+            response = normalize_answer(response)
+            return any(pattern.search(response) for pattern in self._patterns)
+        if self.mode == "regex":
+            return any(pattern.search(response) for pattern in self._patterns)
+        return not self._expected.isdisjoint(extract_dates(response))
+
+def score_results(results: List[Result], matcher: AnswerMatcher) -> None:
+    """Renseigne Result.correct pour tous les résultats en une seule passe.
+    
+    Les erreurs et les itérations non exécutées (arrêt anticipé, budget) restent à None : une graine
+    recopiée après des réponses identiques ne doit pas compter comme un échantillon de plus.
+    """
+    verdicts = {}
+    for result in results:
+        if result.response.startswith("ERREUR:") or result.status in SKIPPED_STATUSES:
+            continue
+        # Les réponses identiques (fréquentes à température 0) ne sont évaluées qu'une fois
+        if result.response not in verdicts:
+            verdicts[result.response] = matcher.matches(result.response)
+        result.correct = verdicts[result.response]
+
+def build_pareto_table(results: List[Result]) -> List[Dict[str, Any]]:
+    """Exactitude et latence par modèle et température, avec le front de Pareto (exactitude maximale, latence minimale)."""
+    groups = {}
+    for result in results:
+        if result.correct is None:
+            continue
+        group = groups.setdefault((result.model, result.temperature), {"scored": 0, "correct": 0, "times": []})
+        group["scored"] += 1
+        group["correct"] += int(result.correct)
+        if is_measured(result):
+            group["times"].append(result.response_time)
+    
+    rows = [{
+        "model": model,
+        "temperature": temperature,
+        "scored": group["scored"],
+        "accuracy": group["correct"] / group["scored"],
+        "mean_latency": sum(group["times"]) / len(group["times"]) if group["times"] else None,
+    } for (model, temperature), group in groups.items()]
+    
+    for row in rows:
+        row["pareto"] = row["mean_latency"] is not None and not any(
+            other is not row and other["mean_latency"] is not None
+            and other["accuracy"] >= row["accuracy"] and other["mean_latency"] <= row["mean_latency"]
+            and (other["accuracy"] > row["accuracy"] or other["mean_latency"] < row["mean_latency"])
+            for other in rows
+        )
+    return sorted(rows, key=lambda row: (row["mean_latency"] is None, row["mean_latency"] or 0))
+
+class EarlyStopper:
+    """Arrêt anticipé du balayage des graines d'une cellule (modèle, prompts, contexte, température).
+    
+    Une cellule est arrêtée dès que `identical` réponses consécutives sont identiques, ou, si
+    latency_tolerance est renseigné, dès que la demi-largeur de l'intervalle de confiance à 95 %
+    de la latence moyenne descend sous cette fraction de la moyenne. Les réponses sont prises
+    dans leur ordre d'arrivée, ce qui reste valable avec des requêtes simultanées.
+    """
+    
+    def __init__(self, identical: int = 0, latency_tolerance: float = 0.0):
+        self.identical = identical
+        self.latency_tolerance = latency_tolerance
+        self._cells = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self) -> bool:
+        return self.identical > 0 or self.latency_tolerance > 0
+    
+    @staticmethod
+    def cell(item: Any) -> tuple:
+        return (item.model, item.system_prompt_id, item.user_prompt_id, item.context_id, float(item.temperature))
+    
+    def stopped(self, iteration: Iteration) -> Optional[Dict[str, Any]]:
+        """État de la cellule de l'itération si elle est arrêtée, None sinon."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            state = self._cells.get(self.cell(iteration))
+            return dict(state) if state and state["status"] else None
+    
+    def record(self, result: Result) -> None:
+        if not self.enabled or result.status in SKIPPED_STATUSES:
+            return
+        with self._lock:
+            state = self._cells.setdefault(self.cell(result), {"last": None, "streak": 0, "times": [], "status": None})
+            if state["status"]:
+                return
+            if result.response.startswith("ERREUR:") or result.status == "timeout":
+                state["last"], state["streak"] = None, 0
+                return
+            state["streak"] = state["streak"] + 1 if result.response == state["last"] else 1
+            state["last"] = result.response
+            if is_measured(result):
+                state["times"].append(result.response_time)
             
-            for sys_id, system_prompt in system_prompts.items():
-                for prompt_id, user_prompt in user_prompts.items():
-                    for ctx_id, context in contexts.items():
-                        for seed in config.seeds:
-                            for temperature in config.temperatures:
-                                logger.debug(f"Génération pour {model} (seed={seed}, temp={temperature})")
-                                
-                                full_prompt = f"{user_prompt}\n\n{context}" if context else user_prompt
-                                start_time = time.time()
-                                
-                                try:
-                                    response = ollama.chat(
-                                        model=model,
-                                        messages=[
-                                            {"role": "system", "content": system_prompt},
-                                            {"role": "user", "content": full_prompt}
-                                        ],
-                                        options={
-                                            "seed": seed if seed is not None else None,
-                                            "temperature": temperature
-                                        }
-                                    )
-                                    
-                                    result = Result(
-                                        model=model,
-                                        system_prompt=system_prompt,
-                                        system_prompt_id=sys_id,
-                                        user_prompt=user_prompt,
-                                        user_prompt_id=prompt_id,
-                                        context=context,
-                                        context_id=ctx_id,
-                                        seed=seed,
-                                        temperature=temperature,
-                                        response=response["message"]["content"],
-                                        response_time=time.time() - start_time,
-                                        commentaire=config.commentaire,
-                                        Resultats=config.resultats if config.resultats else None
-                                    )
-                                    
-                                except Exception as e:
-                                    logger.error(f"Erreur avec {model} (temp={temperature}): {e}")
-                                    result = Result(
-                                        model=model,
-                                        system_prompt=system_prompt,
-                                        system_prompt_id=sys_id,
-                                        user_prompt=user_prompt,
-                                        user_prompt_id=prompt_id,
-                                        context=context,
-                                        context_id=ctx_id,
-                                        seed=seed,
-                                        temperature=temperature,
-                                        response=f"ERREUR: {str(e)}",
-                                        response_time=time.time() - start_time,
-                                        commentaire=config.commentaire,
-                                        Resultats=config.resultats if config.resultats else None
-                                    )
-                                
-                                results.append(result)
-                                
-                                # Mise à jour du fichier JSON
-                                try:
-                                    json_data = json.loads(json_output.read_text(encoding='utf-8'))
-                                    json_data["results"].append(result.model_dump())
-                                    json_output.write_text(json.dumps(json_data, indent=2, ensure_ascii=False), encoding='utf-8')
-                                except Exception as e:
-                                    logger.error(f"Erreur lors de l'écriture du résultat dans le fichier JSON: {e}")
-                                
-                                progress.update(task, advance=1)
+            if self.identical and state["streak"] >= self.identical:
+                state["status"] = "identical"
+            elif self.latency_tolerance and len(state["times"]) >= max(self.identical, EARLY_STOP_MIN_SAMPLES):
+                times = state["times"]
+                mean = sum(times) / len(times)
+                std = (sum((t - mean) ** 2 for t in times) / (len(times) - 1)) ** 0.5
+                if 1.96 * std / len(times) ** 0.5 <= self.latency_tolerance * mean:
+                    state["status"] = "converged"
+            if state["status"]:
+                logger.info(f"Arrêt anticipé pour {result.model} ({result.system_prompt_id}/{result.user_prompt_id}/"
+                            f"{result.context_id}, temp={result.temperature}) : "
+                            f"{'réponses identiques' if state['status'] == 'identical' else 'latence stabilisée'}")
+
+def skipped_result(iteration: Iteration, config: ModelConfig, status: str, response: str = "") -> Result:
+    """Résultat d'une itération non exécutée après l'arrêt anticipé de sa cellule."""
+    return Result(
+        model=iteration.model,
+        system_prompt=iteration.system_prompt,
+        system_prompt_id=iteration.system_prompt_id,
+        user_prompt=iteration.user_prompt,
+        user_prompt_id=iteration.user_prompt_id,
+        context=iteration.context,
+        context_id=iteration.context_id,
+        seed=iteration.seed,
+        temperature=iteration.temperature,
+        response=response,
+        response_time=0.0,
+        commentaire=config.commentaire,
+        Resultats=config.resultats if config.resultats else None,
+        status=status
+    )
+
+def score_run(results: List[Result], config: ModelConfig, score_mode: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Évalue les résultats par rapport aux réponses attendues de la configuration (None si elle n'en fournit pas)."""
+    if not config.resultats:
+        return None
+    try:
+        matcher = AnswerMatcher(config.resultats, score_mode or config.score_mode, config.strip_think)
+        score_results(results, matcher)
+        return {"mode": matcher.mode, "strip_think": matcher.strip_think, "pareto": build_pareto_table(results)}
+    except (ValueError, re.error) as e:
+        logger.error(f"Erreur lors de l'évaluation des réponses: {e}")
+        return None
+
+def shard_bounds(index: int, count: int, total: int) -> tuple:
+    """Bornes [début, fin) de la tranche index (1 à count) d'une matrice de total itérations.
     
-    logger.info("Génération des réponses terminée")
+    Les tranches sont contiguës dans l'ordre d'exécution, où les modèles se suivent : chaque
+    tranche ne charge donc que les quelques modèles qu'elle couvre.
+    """
+    return (index - 1) * total // count, index * total // count
+
+def run_iteration(iteration: Iteration, config: ModelConfig, pool: HostPool, options: Optional[RunOptions] = None,
+                  cache: Optional[ResponseCache] = None, sampler: Optional[ResourceSampler] = None,
+                  run_deadline: Optional[float] = None) -> Result:
+    """Exécute une génération (ou la lit depuis le cache) et mesure son temps de réponse.
+    
+    Le temps de réponse est mesuré à partir de l'obtention d'une place sur un serveur,
+    l'attente dans le répartiteur n'est donc pas comptée. Avec options.timeout ou run_deadline,
+    la génération passe en streaming pour pouvoir être interrompue : la réponse partielle est
+    alors enregistrée avec le statut "timeout".
+    """
+    logger.debug(f"Génération pour {iteration.model} (seed={iteration.seed}, temp={iteration.temperature})")
+    
+    options = options or RunOptions()
+    messages = build_messages(iteration, options.context_first)
+    generation_options = build_options(iteration, options.num_predict)
+    start_time = time.time()
+    cached = False
+    status = None
+    host_url = None
+    metrics = {}
+    stream_metrics = {}
+    resources = None
+    
+    try:
+        cached_entry = None
+        if cache:
+            with tracer.span("cache.get"):
+                cached_entry = cache.get(iteration.model, messages, generation_options)
+        if cached_entry is not None:
+            response_text, metrics = cached_entry
+            cached = True
+            end_time = time.time()
+        else:
+            with pool.acquire(iteration.model) as host:
+                host_url = host.url
+                start_time = time.time()
+                deadlines = [d for d in (options.timeout and start_time + options.timeout, run_deadline) if d]
+                with tracer.span("chat", host=host.url):
+                    if options.stream or deadlines:
+                        deadline = min(deadlines, default=None)
+                        with host.bounded_by(deadline) if deadline else nullcontext():
+                            response_text, metrics, stream_metrics, timed_out = stream_chat(
+                                host.client, iteration.model, messages, generation_options, deadline
+                            )
+                        if timed_out:
+                            status = "timeout"
+                            logger.warning(f"Délai dépassé pour {iteration.model} (seed={iteration.seed}, "
+                                           f"temp={iteration.temperature}), réponse partielle conservée")
+                        if not options.stream:
+                            stream_metrics = {}
+                    else:
+                        response = host.client.chat(
+                            model=iteration.model,
+                            messages=messages,
+                            options=generation_options
+                        )
+                        response_text = response["message"]["content"]
+                        metrics = extract_server_metrics(response)
+                end_time = time.time()
+            if sampler:
+                resources = sampler.summarize(start_time, end_time)
+        if cache and not cached and status is None:
+            with tracer.span("cache.put"):
+                cache.put(iteration.model, messages, generation_options, response_text, metrics)
+    except Exception as e:
+        logger.error(f"Erreur avec {iteration.model} (temp={iteration.temperature}): {e}")
+        response_text = f"ERREUR: {str(e)}"
+        end_time = time.time()
+    
+    return Result(
+        model=iteration.model,
+        system_prompt=iteration.system_prompt,
+        system_prompt_id=iteration.system_prompt_id,
+        user_prompt=iteration.user_prompt,
+        user_prompt_id=iteration.user_prompt_id,
+        context=iteration.context,
+        context_id=iteration.context_id,
+        seed=iteration.seed,
+        temperature=iteration.temperature,
+        response=sys.intern(response_text),  # Réponses identiques (fréquentes à température 0) partagées
+        response_time=end_time - start_time,
+        commentaire=config.commentaire,
+        Resultats=config.resultats if config.resultats else None,
+        cached=cached,
+        host=host_url,
+        status=status,
+        resources=resources,
+        **metrics,
+        **stream_metrics
+    )
+
+def ordered_map(func: Callable[[Any], Any], items: Iterable[Any], concurrency: int = 1) -> Iterator[Any]:
+    """Applique func à chaque élément, jusqu'à concurrency appels simultanés, en conservant l'ordre d'origine."""
+    if concurrency <= 1:
+        for item in items:
+            yield func(item)
+        return
     
-    # Génération du rapport HTML avec Jinja2
+    # Fenêtre bornée : on ne soumet pas tout le produit cartésien d'un coup
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= concurrency * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+def minhash_signatures(np: Any, texts: List[str]) -> Any:
+    """Signatures MinHash des textes, sur leurs shingles de CLUSTER_SHINGLE_SIZE caractères.
+    
+    Les textes sont normalisés (minuscules, espaces réduits) et traités d'un bloc par NumPy. Chaque
+    shingle n'est haché qu'une fois (MinHash à une permutation) : les bits de poids fort du hachage
+    choisissent une des MINHASH_SIZE cases de la signature, qui garde le minimum des bits restants.
+    Les cases vides des textes courts reprennent la case non vide suivante (densification par
+    rotation), ce qui conserve l'estimation de la similarité de Jaccard.
+    """
+    bin_bits = MINHASH_SIZE.bit_length() - 1
+    value_mask = np.uint64((1 << (64 - bin_bits)) - 1)
+    empty = np.iinfo(np.uint64).max
+    powers = np.uint64(1000003) ** np.arange(CLUSTER_SHINGLE_SIZE - 1, -1, -1, dtype=np.uint64)
+    signatures = np.empty((len(texts), MINHASH_SIZE), dtype=np.uint64)
+    for first in range(0, len(texts), MINHASH_BATCH):
+        batch = []
+        for text in texts[first:first + MINHASH_BATCH]:
+            codes = np.frombuffer(" ".join(text.lower().split()).encode("utf-32-le"), dtype=np.uint32)
+            batch.append(codes if len(codes) >= CLUSTER_SHINGLE_SIZE else
+                         np.pad(codes, (0, CLUSTER_SHINGLE_SIZE - len(codes))))
+        lengths = np.array([len(codes) for codes in batch])
+        codes = np.concatenate(batch).astype(np.uint64)
+        span = len(codes) - CLUSTER_SHINGLE_SIZE + 1
+        hashes = sum(codes[offset:offset + span] * power for offset, power in enumerate(powers))
+        # Seuls les shingles entièrement contenus dans un texte sont gardés, rattachés à leur texte
+        counts = lengths - CLUSTER_SHINGLE_SIZE + 1
+        owners = np.repeat(np.arange(len(batch)), counts)
+        starts = np.repeat(np.cumsum(lengths) - lengths - (np.cumsum(counts) - counts), counts) + \
+            np.arange(counts.sum())
+        hashes = hashes[starts] * np.uint64(0x9E3779B97F4A7C15)
+        hashes ^= hashes >> np.uint64(29)
+        hashes *= np.uint64(0xBF58476D1CE4E5B9)
+        block = np.full(len(batch) * MINHASH_SIZE, empty, dtype=np.uint64)
+        np.minimum.at(block, owners * MINHASH_SIZE + (hashes >> np.uint64(64 - bin_bits)).astype(np.int64),
+                      hashes & value_mask)
+        signatures[first:first + len(batch)] = block.reshape(len(batch), MINHASH_SIZE)
+    filled = signatures.copy()
+    for shift in range(1, MINHASH_SIZE):
+        missing = filled == empty
+        if not missing.any():
+            break
+        rotated = np.roll(signatures, -shift, axis=1)
+        filled[missing & (rotated != empty)] = rotated[missing & (rotated != empty)] + np.uint64(shift)
+    return filled
+
+def cluster_responses(texts: List[str], keys: List[Any], threshold: float = CLUSTER_THRESHOLD) -> List[Optional[tuple]]:
+    """Regroupe les textes quasi identiques de même clé par MinHash et LSH.
+    
+    Les textes sont parcourus dans l'ordre : chacun rejoint le groupe du premier représentant de
+    même clé dont la similarité de Jaccard estimée atteint threshold, ou devient lui-même
+    représentant. Seuls les représentants partageant une bande de signature sont comparés, le
+    coût reste donc quasi linéaire. Renvoie, pour chaque texte, (indice du représentant, similarité)
+    ou None s'il est représentant. Sans NumPy, aucun texte n'est regroupé.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        logger.warning("NumPy indisponible, les réponses proches ne sont pas regroupées")
+        return [None] * len(texts)
+    
+    signatures = minhash_signatures(np, texts)
+    # Empreinte de chaque bande de signature, calculée d'un bloc
+    multipliers = np.random.default_rng(1).integers(1, 2**63, MINHASH_SIZE // MINHASH_BANDS, dtype=np.uint64)
+    band_hashes = (signatures.reshape(len(texts), MINHASH_BANDS, -1) * multipliers).sum(axis=2).tolist()
+    buckets = {}
+    assignments = []
+    for index, (bands, key) in enumerate(zip(band_hashes, keys)):
+        bands = [(key, band, value) for band, value in enumerate(bands)]
+        candidates = sorted({leader for band in bands for leader in buckets.get(band, ())})
+        if candidates:
+            similarities = (signatures[candidates] == signatures[index]).mean(axis=1)
+            best = int(similarities.argmax())
+            if similarities[best] >= threshold:
+                assignments.append((candidates[best], float(similarities[best])))
+                continue
+        for band in bands:
+            buckets.setdefault(band, []).append(index)
+        assignments.append(None)
+    return assignments
+
+def inline_diff(reference: str, text: str) -> str:
+    """Différences mot à mot de text par rapport à reference, en HTML (<del> et <ins>).
+    
+    Le préfixe et le suffixe communs, ramenés à une frontière de mot, sont recopiés sans passer
+    par difflib : entre réponses proches, seule une petite partie du texte est réellement comparée.
+    """
+    prefix = len(os.path.commonprefix([reference, text]))
+    if prefix < min(len(reference), len(text)):
+        prefix = max(reference.rfind(" ", 0, prefix), reference.rfind("\n", 0, prefix)) + 1
+    suffix = min(len(os.path.commonprefix([reference[::-1], text[::-1]])), len(reference) - prefix, len(text) - prefix)
+    if suffix:
+        boundary = re.compile(r"\s").search(reference, len(reference) - suffix)
+        suffix = len(reference) - boundary.end() if boundary else 0
+    
+    # Les espaces sont rattachés au mot qui les précède : moins de jetons, et des jetons plus distinctifs
+    tokenize = re.compile(r"\w+\s*|[^\w\s]\s*|\s+").findall
+    old = tokenize(reference[prefix:len(reference) - suffix])
+    new = tokenize(text[prefix:len(text) - suffix])
+    parts = [html.escape(text[:prefix])]
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old, new).get_opcodes():
+        if tag == "equal":
+            parts.append(html.escape("".join(new[j1:j2])))
+            continue
+        if i1 < i2:
+            parts.append(f"<del>{html.escape(''.join(old[i1:i2]))}</del>")
+        if j1 < j2:
+            parts.append(f"<ins>{html.escape(''.join(new[j1:j2]))}</ins>")
+    parts.append(html.escape(text[len(text) - suffix:]))
+    return "".join(parts)
+
+def cluster_report_responses(grouped_results: Dict[tuple, Dict[int, Result]], sorted_seeds: List[int],
+                             threshold: float = CLUSTER_THRESHOLD) -> tuple:
+    """Repère les réponses proches d'une réponse déjà affichée pour un même modèle, prompt et contexte.
+    
+    Les graines et températures d'une même cellule sont regroupées dans l'ordre de rendu des tableaux ;
+    une réponse jugée exacte n'est jamais rapprochée d'une réponse fausse. Renvoie, pour chaque tableau,
+    les membres (graine -> représentant, similarité et différences) et la taille des groupes des
+    représentants (graine -> nombre de réponses), ainsi que la diversité par modèle.
+    """
+    entries = []
+    for table, ((model, sys_id, prompt_id, ctx_id, temp), seeds) in enumerate(grouped_results.items()):
+        for seed in sorted_seeds:
+            result = seeds.get(seed)
+            if result is None or result.status in SKIPPED_STATUSES or result.response.startswith("ERREUR:"):
+                continue
+            entries.append((table, seed, temp, result, (model, sys_id, prompt_id, ctx_id, result.correct)))
+    
+    members = [{} for _ in grouped_results]
+    sizes = [{} for _ in grouped_results]
+    diversity = {}
+    if threshold <= 0 or not entries:
+        return members, sizes, diversity
+    
+    assignments = cluster_responses([entry[3].response for entry in entries], [entry[4] for entry in entries],
+                                    threshold)
+    for (table, seed, temp, result, key), assignment in zip(entries, assignments):
+        counts = diversity.setdefault(key[0], {"responses": 0, "clusters": 0})
+        counts["responses"] += 1
+        if assignment is None:
+            counts["clusters"] += 1
+            sizes[table][seed] = 1
+            continue
+        leader, similarity = assignment
+        leader_table, leader_seed, leader_temp, leader_result, _ = entries[leader]
+        sizes[leader_table][leader_seed] += 1
+        members[table][seed] = {
+            "seed": leader_seed,
+            "temperature": leader_temp,
+            "similarity": similarity,
+            "identical": result.response == leader_result.response,
+            "diff": inline_diff(leader_result.response, result.response),
+        }
+    return members, sizes, diversity
+
+def build_compact_details(grouped_results: Dict[tuple, Dict[int, Result]], sorted_seeds: List[int],
+                          duplicate_seeds: List[set], near_duplicates: List[Dict[int, Dict[str, Any]]],
+                          cluster_sizes: List[Dict[int, int]], model_temp_first_ids: Dict[str, str]) -> str:
+    """Sérialise les tableaux de résultats détaillés pour le mode de rapport compact.
+    
+    Chaque réponse affichée n'est stockée qu'une fois ; les tableaux y font référence par indice.
+    Le tout est compressé en gzip et encodé en base64, le navigateur le décompresse avec
+    DecompressionStream et ne construit un tableau qu'à son approche de la zone visible.
+    """
+    import base64
+    import gzip
+    
+    responses = {}
+    tables = []
+    anchors = set()
+    for table, ((model, sys_id, prompt_id, ctx_id, temp), seeds) in enumerate(grouped_results.items()):
+        anchor = f"model_{model_temp_first_ids[f'{model} (temp={temp})']}"
+        columns = []
+        for seed in sorted_seeds:
+            result = seeds.get(seed)
+            if result is None:
+                continue
+            if result.status in SKIPPED_STATUSES:
+                time_cell = "-"
+            elif result.cached:
+                time_cell = '<span class="identical">(cache)</span>'
+            else:
+                time_cell = f"{result.response_time:.2f}" + \
+                    (' <span class="identical">(délai dépassé)</span>' if result.status == "timeout" else "")
+            prefill = "-"
+            if result.prompt_eval_count is not None:
+                prefill = f"{result.prompt_eval_count} tokens" + \
+                    (f" / {result.prompt_eval_duration / NS_PER_S:.3f} s" if result.prompt_eval_duration else "")
+            column = {"seed": seed, "time": time_cell, "prefill": prefill}
+            if result.status == "converged":
+                column["note"] = "(non exécutée, latence stabilisée)"
+            elif result.status == "budget":
+                column["note"] = "(non exécutée, budget épuisé)"
+            elif seed in duplicate_seeds[table] or result.status == "identical":
+                column["note"] = "(identique)"
+            elif seed in near_duplicates[table]:
+                near = near_duplicates[table][seed]
+                column["near"] = (f"(proche de la graine {near['seed']}"
+                                  + (f" à temp={near['temperature']}" if near["temperature"] != temp else "")
+                                  + f", similarité {near['similarity'] * 100:.0f} %)")
+                column["diff"] = near["diff"]
+            else:
+                column["response"] = responses.setdefault(result.response, len(responses))
+                column["correct"] = bool(result.correct)
+                column["size"] = cluster_sizes[table].get(seed, 1)
+            columns.append(column)
+        tables.append({
+            "anchor": anchor if anchor not in anchors else None,
+            "title": f"Modèle: {model} | Système: {sys_id} | Prompt: {prompt_id} | Contexte: {ctx_id} | Température: {temp}",
+            "columns": columns,
+        })
+        anchors.add(anchor)
+    
+    payload = json.dumps({"responses": list(responses), "tables": tables}, ensure_ascii=False, separators=(",", ":"))
+    return base64.b64encode(gzip.compress(payload.encode("utf-8"), mtime=0)).decode("ascii")
+
+@functools.lru_cache(maxsize=None)
+def get_report_template() -> Any:
+    """Compile le template HTML une seule fois par processus."""
+    from jinja2 import Environment, FileSystemLoader
     script_dir = Path(__file__).parent
     env = Environment(loader=FileSystemLoader(str(script_dir)))
     env.globals.update({
@@ -644,41 +2727,87 @@ def compare_llms(config_file: str, output_file: Optional[str] = None, ollama_url
         'round': round,
         'datetime': datetime
     })
-    template = env.from_string(HTML_TEMPLATE)
+    return env.from_string(HTML_TEMPLATE)
+
+def generate_html_report(results: List[Result], system_info: SystemInfo, config: ModelConfig, output_file: str,
+                         available_models: List[str], statistics: Optional[Dict[str, Any]] = None,
+                         scoring: Optional[Dict[str, Any]] = None,
+                         model_loads: Optional[List[Dict[str, Any]]] = None,
+                         cluster_threshold: float = CLUSTER_THRESHOLD, report_mode: str = "full") -> None:
+    """Génère le rapport HTML en l'écrivant au fil du rendu, sans le construire en mémoire.
+    
+    cluster_threshold règle le regroupement des réponses proches (0 pour le désactiver). En mode
+    "compact", les résultats détaillés sont embarqués une seule fois, compressés, et construits
+    par le navigateur au fil du défilement (voir build_compact_details).
+    """
+    with tracer.span("get_report_template"):
+        template = get_report_template()
     
     # Préparation des données pour le template
     model_temp_times = {}
     model_temp_first_ids = {}
-    avg_tokens = {}
+    server_metrics = summarize_server_metrics(results)
+    avg_tokens = {key: metrics["avg_tokens"] for key, metrics in server_metrics.items()}
     unique_system_prompts = {}
     unique_user_prompts = {}
     unique_contexts = {}
     grouped_results = {}
     sorted_seeds = sorted(config.seeds)
-    previous_responses = []
     
-    # Organisation des résultats
-    for result in results:
-        model_temp_key = f"{result.model} (temp={result.temperature})"
-        if model_temp_key not in model_temp_times:
-            model_temp_times[model_temp_key] = []
-            model_temp_first_ids[model_temp_key] = f"model_{result.model.replace(':', '_')}_{str(result.temperature).replace('.', '_')}"
-            avg_tokens[model_temp_key] = 0
+    with tracer.span("report.prepare", results=len(results)):
+        # Organisation des résultats
+        for result in results:
+            model_temp_key = f"{result.model} (temp={result.temperature})"
+            if model_temp_key not in model_temp_times:
+                model_temp_times[model_temp_key] = []
+                model_temp_first_ids[model_temp_key] = f"model_{result.model.replace(':', '_')}_{str(result.temperature).replace('.', '_')}"
         
-        model_temp_times[model_temp_key].append(result.response_time)
+            # Les temps des réponses lues depuis le cache ou non générées ne sont pas des mesures de latence
+            if is_measured(result):
+                model_temp_times[model_temp_key].append(result.response_time)
         
-        # Collecte des prompts uniques
-        unique_system_prompts[result.system_prompt_id] = result.system_prompt
-        unique_user_prompts[result.user_prompt_id] = result.user_prompt
-        unique_contexts[result.context_id] = result.context
+            # Collecte des prompts uniques
+            unique_system_prompts[result.system_prompt_id] = result.system_prompt
+            unique_user_prompts[result.user_prompt_id] = result.user_prompt
+            unique_contexts[result.context_id] = result.context
         
-        # Groupement des résultats
-        group_key = (result.model, result.system_prompt_id, result.user_prompt_id, result.context_id, result.temperature)
-        if group_key not in grouped_results:
-            grouped_results[group_key] = {}
-        grouped_results[group_key][result.seed] = result
+            # Groupement des résultats
+            group_key = (result.model, result.system_prompt_id, result.user_prompt_id, result.context_id, result.temperature)
+            if group_key not in grouped_results:
+                grouped_results[group_key] = {}
+            grouped_results[group_key][result.seed] = result
+    
+        # Détection des réponses déjà affichées, dans l'ordre de rendu des tableaux
+        seen_responses = set()
+        duplicate_seeds = []
+        for seeds in grouped_results.values():
+            duplicates = set()
+            for seed in sorted_seeds:
+                if seed not in seeds:
+                    continue
+                digest = content_hash(seeds[seed].response)
+                if digest in seen_responses:
+                    duplicates.add(seed)
+                else:
+                    seen_responses.add(digest)
+            duplicate_seeds.append(duplicates)
     
-    html_content = template.render(
+    # Regroupement des réponses proches (MinHash), affichées sous forme de différences
+    with tracer.span("cluster_responses"):
+        near_duplicates, cluster_sizes, diversity = cluster_report_responses(grouped_results, sorted_seeds,
+                                                                             cluster_threshold)
+    
+    compact_details = None
+    if report_mode == "compact":
+        with tracer.span("build_compact_details"):
+            compact_details = build_compact_details(grouped_results, sorted_seeds, duplicate_seeds, near_duplicates,
+                                                    cluster_sizes, model_temp_first_ids)
+    
+    stream = template.generate(
+        resource_charts=build_resource_charts(results),
+        statistics=statistics,
+        scoring=scoring,
+        model_loads=model_loads,
         results=results,
         system_info=system_info,
         datetime=datetime,
@@ -686,57 +2815,1193 @@ def compare_llms(config_file: str, output_file: Optional[str] = None, ollama_url
         model_temp_times=model_temp_times,
         model_temp_first_ids=model_temp_first_ids,
         avg_tokens=avg_tokens,
+        server_metrics=server_metrics,
+        show_ttft=any(metrics["ttft_p50"] is not None for metrics in server_metrics.values()),
         unique_system_prompts=unique_system_prompts,
         unique_user_prompts=unique_user_prompts,
         unique_contexts=unique_contexts,
         grouped_results=grouped_results,
+        duplicate_seeds=duplicate_seeds,
+        near_duplicates=near_duplicates,
+        cluster_sizes=cluster_sizes,
+        diversity=diversity,
+        cluster_threshold=cluster_threshold,
+        compact_details=compact_details,
+        compact_render_margin=COMPACT_RENDER_MARGIN,
+        skipped_statuses=SKIPPED_STATUSES,
         sorted_seeds=sorted_seeds,
-        previous_responses=previous_responses,
         output_file=output_file,
         available_models=available_models
     )
     
-    # Sauvegarde du rapport HTML
-    Path(output_file).write_text(html_content, encoding='utf-8')
+    # Sauvegarde du rapport HTML (le rendu Jinja a lieu pendant l'écriture)
+    with tracer.span("report.render"), open(output_file, 'w', encoding='utf-8') as f:
+        f.writelines(stream)
     logger.info(f"Rapport HTML sauvegardé dans {output_file}")
+
+def compare_llms(config_file: str, output_file: Optional[str] = None,
+                 ollama_url: Union[str, List[str]] = DEFAULT_OLLAMA_URL,
+                 options: Optional[RunOptions] = None) -> List[Result]:
+    """Compare différents LLM en utilisant Ollama selon la configuration spécifiée.
     
-    # Ouverture du rapport dans le navigateur
-    webbrowser.open('file://' + str(Path(output_file).absolute()))
-    logger.info("Rapport ouvert dans le navigateur")
+    ollama_url peut être une URL ou une liste d'URL : les requêtes sont alors réparties entre les serveurs.
+    """
+    options = options or RunOptions()
+    if options.trace:
+        tracer.start()
+    ollama_urls = [ollama_url] if isinstance(ollama_url, str) else list(ollama_url)
+    logger.info(f"Chargement de la configuration depuis {config_file}")
+    for url in ollama_urls:
+        logger.info(f"Utilisation du serveur Ollama: {url}")
+    if options.concurrency > 1:
+        logger.info(f"Exécution parallèle : {options.concurrency} requêtes simultanées par serveur")
     
-    # Sauvegarde des résultats dans un fichier JSON
+    # Vérification du fichier de configuration
+    config_path = Path(config_file)
+    if not config_path.exists():
+        logger.error(f"Le fichier de configuration {config_file} n'existe pas")
+        return []
+    
+    try:
+        # Chargement de la configuration
+        with tracer.span("load_config"):
+            import json_repair
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config_data = json_repair.load(f)
+            config = ModelConfig(**config_data)
+    except Exception as e:
+        logger.error(f"Erreur lors du chargement de la configuration: {e}")
+        return []
+    
+    # Validation de la configuration
+    if not all([config.models, config.system_prompts, config.user_prompts]):
+        logger.error("Configuration invalide: modèles, prompts système ou prompts utilisateur manquants")
+        return []
+    
+    # Limites de génération : la ligne de commande l'emporte sur la configuration
+    options = replace(options, **{
+        name: getattr(config, name) for name in ("num_predict", "timeout", "budget")
+        if getattr(options, name) is None
+    })
+    
+    # Détermination du nom du fichier de sortie
+    base_name = config_path.stem
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    shard_name = f"_shard{options.shard[0]}-{options.shard[1]}" if options.shard else ""
+    output_file = f"{base_name}{shard_name}_{timestamp}.html"
+    logger.info(f"Fichier de sortie : {output_file}")
+    
+    # Récupération des informations système
+    with tracer.span("get_system_info"):
+        system_info = get_system_info(ollama_urls[0])
+        system_info.hosts = [{"url": url, "ollama_version": get_ollama_version(url)} for url in ollama_urls]
+    
+    # Initialisation du fichier JSON
     json_output = Path(output_file).with_suffix('.json')
     json_output.write_text(json.dumps({
         "system_info": system_info.__dict__,
         "config": config.model_dump(),
-        "results": [result.model_dump() for result in results]
+        "results": []
     }, indent=2, ensure_ascii=False), encoding='utf-8')
     
+    # Traitement des fichiers pour les prompts
+    system_prompts = {k: read_content_from_file_if_exists(v) for k, v in config.system_prompts.items()}
+    try:
+        user_prompts = open_text_source(config.user_prompts)
+        contexts = open_text_source(config.contexts)
+    except Exception as e:
+        logger.error(f"Erreur lors de l'ouverture des prompts ou contextes: {e}")
+        return []
+    # Les sources en flux sont comptées sans lire leur contenu
+    user_prompt_count = len(user_prompts)
+    context_count = len(contexts)
+    
+    logger.info(f"Configuration chargée : {len(config.models)} modèles, {len(system_prompts)} prompts système, "
+                f"{user_prompt_count} prompts utilisateur, {context_count} contextes")
+    
+    # Vérification des modèles disponibles sur chaque serveur
+    pool = HostPool(ollama_urls, options.concurrency, options.timeout)
+    try:
+        with tracer.span("ollama.list"):
+            pool.refresh()
+        listed_models = [model for host in pool.hosts for model in host.listed_models]
+        available_models = list(dict.fromkeys(model.model for model in listed_models))
+        for model in config.models:
+            if model not in available_models:
+                logger.warning(f"Le modèle '{model}' n'est pas disponible. Utilisez 'ollama pull {model}' pour le télécharger.")
+            elif len(pool.hosts) > 1:
+                for host in pool.hosts:
+                    if model not in host.available_models:
+                        logger.warning(f"Le modèle '{model}' n'est pas disponible sur {host.url}, ce serveur ne sera pas utilisé pour lui.")
+    except Exception as e:
+        logger.error(f"Erreur lors de la vérification des modèles: {e}")
+        logger.error("Assurez-vous qu'Ollama est installé et en cours d'exécution.")
+        return []
+    
+    # Calcul du nombre total d'itérations
+    iterations_per_model = len(system_prompts) * user_prompt_count * context_count * len(config.seeds) * len(config.temperatures)
+    total_iterations = len(config.models) * iterations_per_model
+    logger.info(f"Nombre total d'itérations à effectuer : {total_iterations}")
+    
+    # Tranche de la matrice attribuée à cette exécution : bornes [début, fin) par modèle
+    model_ranges = {model: (0, iterations_per_model) for model in config.models}
+    shard = None
+    if options.shard:
+        index, count = options.shard
+        start, end = shard_bounds(index, count, total_iterations)
+        model_ranges = {}
+        for position, model in enumerate(config.models):
+            offset = position * iterations_per_model
+            low, high = max(start, offset), min(end, offset + iterations_per_model)
+            if low < high:
+                model_ranges[model] = (low - offset, high - offset)
+        shard = {"index": index, "count": count, "start": start, "end": end, "total": total_iterations}
+        logger.info(f"Tranche {index}/{count} : {end - start} itérations ({start} à {end - 1}), "
+                    f"modèles : {', '.join(model_ranges) or 'aucun'}")
+    
+    def model_iterations(model: str) -> Iterator[Iteration]:
+        return itertools.islice(iter_model_iterations(model, system_prompts, user_prompts, contexts, config,
+                                                      options.context_first), *model_ranges[model])
+    
+    # Reprise d'une exécution précédente
+    resumed = {}
+    if options.resume:
+        try:
+            resumed = load_resumable_results(options.resume, system_prompts, user_prompts, contexts)
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement de l'exécution à reprendre {options.resume}: {e}")
+            return []
+    
+    # Cache persistant des réponses
+    cache = None
+    if options.cache != "off":
+        try:
+            model_digests = {}
+            for model in listed_models:
+                model_digests.setdefault(model.model, getattr(model, "digest", None))
+            cache = ResponseCache(options.cache_dir, options.cache, model_digests)
+            logger.info(f"Cache des réponses ({options.cache}) : {cache.path}")
+        except Exception as e:
+            logger.warning(f"Cache des réponses indisponible: {e}")
+    
+    def is_pending(iteration: Iteration) -> bool:
+        if iteration_key(iteration) in resumed:
+            return False
+        return not (cache and cache.contains(iteration.model, build_messages(iteration, options.context_first),
+                                             build_options(iteration, options.num_predict)))
+    
+    # Sans reprise ni cache, toutes les itérations sont à faire : inutile de parcourir les textes
+    with tracer.span("count_pending"):
+        pending_per_model = {
+            model: sum(1 for it in model_iterations(model) if is_pending(it)) if resumed or cache else high - low
+            for model, (low, high) in model_ranges.items()
+        }
+    pending_iterations = sum(pending_per_model.values())
+    if options.resume or cache:
+        logger.info(f"Itérations restant à effectuer : {pending_iterations}/"
+                    f"{shard['end'] - shard['start'] if shard else total_iterations}")
+    
+    # Arrêt anticipé des graines par cellule
+    stopper = EarlyStopper(
+        options.early_stop if options.early_stop is not None else config.early_stop,
+        options.early_stop_latency if options.early_stop_latency is not None else config.early_stop_latency
+    )
+    
+    def execute(iteration: Iteration) -> Result:
+        result = resumed.get(iteration_key(iteration))
+        if result is None:
+            if run_deadline is not None and time.time() >= run_deadline:
+                return skipped_result(iteration, config, "budget")
+            stop = stopper.stopped(iteration)
+            if stop:
+                return skipped_result(iteration, config, stop["status"],
+                                      stop["last"] if stop["status"] == "identical" else "")
+            with tracer.span("iteration", model=iteration.model, system_prompt=iteration.system_prompt_id,
+                             user_prompt=iteration.user_prompt_id, context=iteration.context_id,
+                             seed=iteration.seed, temperature=iteration.temperature):
+                result = run_iteration(iteration, config, pool, options, cache, sampler, run_deadline)
+        stopper.record(result)
+        return result
+    
+    results = []
+    current_model = None
+    model_loads = []
+    # Les modèles déjà en mémoire avant l'exécution y sont laissés, seuls ceux qu'elle a chargés sont libérés
+    preloaded = {host.url: set(host.loaded_models) for host in pool.hosts}
+    
+    # Journal des résultats au fil de l'eau, le JSON final n'est assemblé qu'une fois en fin d'exécution
+    result_log_path = json_output.with_suffix('.jsonl')
+    logger.info(f"Journal des résultats : {result_log_path}")
+    
+    # Échantillonnage des ressources pendant les générations
+    sampler = ResourceSampler(options.sample_interval)
+    sampler.start()
+    
+    # Compteurs en direct : débits, erreurs, latences et temps restant par modèle
+    model_sizes = {}
+    for model in listed_models:
+        model_sizes.setdefault(model.model, getattr(model, "size", None))
+    telemetry = RunTelemetry(pool, pending_per_model, model_sizes, options.metrics_file)
+    metrics_server = None
+    if options.metrics_port is not None:
+        try:
+            metrics_server = start_metrics_server(telemetry, port=options.metrics_port)
+            logger.info(f"Métriques exposées sur http://127.0.0.1:{metrics_server.server_address[1]}/metrics")
+        except OSError as e:
+            logger.warning(f"Point d'accès /metrics indisponible sur le port {options.metrics_port}: {e}")
+    if options.metrics_file:
+        logger.info(f"Fichier de métriques : {options.metrics_file}")
+    telemetry.start()
+    
+    run_start = time.time()
+    run_deadline = run_start + options.budget if options.budget else None
+    with ResultLog(result_log_path) as result_log, make_progress(telemetry, not options.show_progress) as progress:
+        task = progress.add_task("Génération des réponses...", total=pending_iterations)
+        model_tasks = {}
+        if len(model_ranges) > 1:
+            model_tasks = {model: progress.add_task(f"  {model}", total=count, model=model)
+                           for model, count in pending_per_model.items() if count}
+        
+        for model in model_ranges:
+            out_of_budget = run_deadline is not None and time.time() >= run_deadline
+            if current_model != model and pending_per_model[model] and not out_of_budget:
+                logger.info(f"Changement de modèle : passage à {model}")
+                for host in pool.hosts_for(model):
+                    # Les modèles précédents de la comparaison sont libérés avant de charger le suivant
+                    if not options.keep_loaded:
+                        for previous in sorted((host.loaded_models & set(config.models)) - {model} - preloaded[host.url]):
+                            unload_model(host, previous)
+                    load = load_model(host, model)
+                    if load:
+                        model_loads.append(load)
+                current_model = model
+            
+            telemetry.begin(model)
+            for result in ordered_map(execute, model_iterations(model), pool.capacity):
+                results.append(result)
+                
+                # Ajout au journal JSONL
+                try:
+                    with tracer.span("result_log.append"):
+                        result_log.append(result)
+                except Exception as e:
+                    logger.error(f"Erreur lors de l'écriture du résultat dans le journal JSONL: {e}")
+                
+                if iteration_key(result) not in resumed:
+                    telemetry.record(result)
+                    if not result.cached:
+                        progress.update(task, advance=1)
+                        if model in model_tasks:
+                            progress.update(model_tasks[model], advance=1)
+            telemetry.finish(model)
+    
+    telemetry.stop()
+    if metrics_server:
+        metrics_server.shutdown()
+    
+    if current_model and not options.keep_loaded:
+        for host in pool.hosts_for(current_model):
+            if current_model not in preloaded[host.url]:
+                unload_model(host, current_model)
+    
+    if cache:
+        logger.info(f"Cache des réponses : {cache.hits} réponses réutilisées, {cache.misses} générées")
+        cache.close()
+    
+    sampler.stop()
+    logger.info("Génération des réponses terminée")
+    skipped = sum(1 for result in results if result.status in ("identical", "converged"))
+    if skipped:
+        logger.info(f"Arrêt anticipé : {skipped} itérations non exécutées")
+    over_budget = sum(1 for result in results if result.status == "budget")
+    if over_budget:
+        logger.warning(f"Budget de {options.budget} s épuisé : {over_budget} itérations non exécutées "
+                       f"(relançables avec --resume)")
+    timeouts = sum(1 for result in results if result.status == "timeout")
+    if timeouts:
+        logger.warning(f"{timeouts} générations interrompues par le délai, réponses partielles conservées")
+    # Les résultats repris d'une exécution précédente gardent leur serveur mais pas son activité actuelle
+    generated = [result for result in results if iteration_key(result) not in resumed] if resumed else results
+    system_info.hosts = summarize_hosts(generated, system_info.hosts, time.time() - run_start)
+    
+    # Évaluation des réponses par rapport aux réponses attendues
+    with tracer.span("score_run"):
+        scoring = score_run(results, config, options.score_mode)
+    
+    # Analyse statistique des latences et débits
+    with tracer.span("compute_statistics"):
+        statistics = compute_statistics(results)
+    
+    # Génération du rapport HTML
+    with tracer.span("generate_html_report"):
+        generate_html_report(results, system_info, config, output_file, available_models, statistics, scoring,
+                             model_loads, options.cluster_threshold, options.report_mode)
+    
+    # Ouverture du rapport dans le navigateur
+    if options.open_browser:
+        with tracer.span("webbrowser.open"):
+            import webbrowser
+            webbrowser.open('file://' + str(Path(output_file).absolute()))
+        logger.info("Rapport ouvert dans le navigateur")
+    
+    # Sauvegarde des résultats dans un fichier JSON
+    json_output = Path(output_file).with_suffix('.json')
+    with tracer.span("write_results_json"):
+        json_output.write_text(json.dumps(
+            build_results_payload(system_info, config, results, options.schema_version,
+                                  {"shard": shard, "model_loads": model_loads or None, "statistics": statistics,
+                                   "scoring": scoring}),
+            indent=2, ensure_ascii=False
+        ), encoding='utf-8')
+    
     logger.info(f"Résultats sauvegardés dans {json_output}")
     
+    if options.trace:
+        trace_output = Path(output_file).with_suffix('.trace.json')
+        tracer.dump(trace_output)
+        logger.info(f"Trace des phases sauvegardée dans {trace_output} (chrome://tracing ou ui.perfetto.dev)")
+    
+    # Le JSON final contient tous les résultats, le journal n'est plus nécessaire
+    result_log_path.unlink(missing_ok=True)
+    
     return results
 
+def config_fingerprint(results: List[Result]) -> str:
+    """Empreinte de ce qui est comparé (prompts, contextes, graines, températures), hors liste de modèles.
+    
+    Elle est calculée depuis les résultats pour couvrir aussi les anciens fichiers sans configuration.
+    """
+    texts = {}
+    seeds = set()
+    temperatures = set()
+    for result in results:
+        for field in ("system_prompt", "user_prompt", "context"):
+            texts.setdefault(f"{field}:{getattr(result, f'{field}_id')}", getattr(result, field))
+        seeds.add(result.seed)
+        temperatures.add(float(result.temperature))
+    return text_ref(json.dumps({
+        "texts": {key: content_hash(text) for key, text in sorted(texts.items())},
+        "seeds": sorted(seeds),
+        "temperatures": sorted(temperatures),
+    }))
+
+def run_date_from_path(path: Path) -> str:
+    """Date d'une exécution, lue dans le nom du fichier (<config>_AAAAMMJJ_HHMMSS.json) ou sa date de modification."""
+    match = RUN_TIMESTAMP_RE.search(path.stem)
+    if match:
+        return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").isoformat()
+    return datetime.fromtimestamp(path.stat().st_mtime).isoformat(timespec="seconds")
+
+class RunHistory:
+    """Index SQLite des fichiers de résultats, pour suivre latence et débit d'une exécution à l'autre.
+    
+    Chaque fichier est résumé par exécution, configuration (config_fingerprint), modèle, serveur et
+    version d'evallm. L'indexation est incrémentale : un fichier inchangé (date et taille) n'est pas relu.
+    """
+    
+    def __init__(self, path: Path = HISTORY_DB):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = Path(path)
+        self._db = sqlite3.connect(str(self.path))
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime REAL, size INTEGER, run_date TEXT);"
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "path TEXT, run_date TEXT, config_hash TEXT, model TEXT, host TEXT, evallm_version TEXT, "
+            "responses INTEGER, errors INTEGER, mean_latency REAL, p50_latency REAL, p95_latency REAL, tokens_per_s REAL);"
+            "CREATE INDEX IF NOT EXISTS runs_key ON runs(config_hash, model, host, evallm_version, run_date);"
+            "CREATE INDEX IF NOT EXISTS runs_path ON runs(path);"
+        )
+        self._db.commit()
+    
+    def index(self, paths: Iterable[str]) -> tuple:
+        """Indexe les JSON de résultats (fichiers ou répertoires parcourus récursivement).
+        
+        Renvoie le nombre de fichiers (ré)indexés et le nombre de fichiers inchangés.
+        """
+        indexed = unchanged = 0
+        for path in paths:
+            path = Path(path)
+            # Les traces (--trace) partagent l'extension des résultats
+            files = sorted(file for file in path.rglob("*.json") if not file.name.endswith(".trace.json")) \
+                if path.is_dir() else [path]
+            for file in files:
+                stat = file.stat()
+                key = str(file.resolve())
+                known = self._db.execute("SELECT mtime, size FROM files WHERE path = ?", (key,)).fetchone()
+                if known == (stat.st_mtime, stat.st_size):
+                    unchanged += 1
+                    continue
+                self._db.execute("DELETE FROM runs WHERE path = ?", (key,))
+                rows = self._summarize(file, key)
+                self._db.executemany("INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                                 (key, stat.st_mtime, stat.st_size, rows[0][1] if rows else None))
+                indexed += 1
+        self._db.commit()
+        return indexed, unchanged
+    
+    def _summarize(self, file: Path, key: str) -> List[tuple]:
+        try:
+            data = load_results_file(str(file))
+        except Exception as e:
+            # Fichiers de configuration ou JSON étrangers : mémorisés sans résultat pour ne pas être relus
+            logger.debug(f"{file} ignoré: {e}")
+            return []
+        results = data["results"]
+        if not results:
+            return []
+        system_info = data["system_info"] or {}
+        version = system_info.get("evallm_version") or "inconnue"
+        # Les anciens résultats n'indiquent pas de serveur : Ollama tournait sur la machine de l'exécution
+        default_host = system_info.get("hostname") or "local"
+        fingerprint = config_fingerprint(results)
+        run_date = run_date_from_path(file)
+        
+        groups = {}
+        for result in results:
+            groups.setdefault((result.model, result.host or default_host), []).append(result)
+        rows = []
+        for (model, host), group in groups.items():
+            errors = sum(1 for r in group if r.response.startswith("ERREUR:"))
+            latencies = [r.response_time for r in group if is_measured(r) and not r.response.startswith("ERREUR:")]
+            tokens = sum(r.eval_count for r in group if is_measured(r) and r.eval_count and r.eval_duration)
+            eval_ns = sum(r.eval_duration for r in group if is_measured(r) and r.eval_count and r.eval_duration)
+            rows.append((
+                key, run_date, fingerprint, model, host, version, len(group), errors,
+                sum(latencies) / len(latencies) if latencies else None,
+                percentile(latencies, 50), percentile(latencies, 95),
+                tokens / (eval_ns / NS_PER_S) if eval_ns else None,
+            ))
+        return rows
+    
+    def trends(self, model: Optional[str] = None, config_hash: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Exécutions indexées, par clé (configuration, modèle, serveur, version) puis par date.
+        
+        latency_change compare la latence moyenne à l'exécution précédente de la même clé.
+        """
+        query = "SELECT * FROM runs WHERE (? IS NULL OR model = ?) AND (? IS NULL OR config_hash LIKE ? || '%') " \
+                "ORDER BY config_hash, model, host, evallm_version, run_date"
+        cursor = self._db.execute(query, (model, model, config_hash, config_hash))
+        columns = [column[0] for column in cursor.description]
+        rows = []
+        previous = None
+        for values in cursor:
+            row = dict(zip(columns, values))
+            key = (row["config_hash"], row["model"], row["host"], row["evallm_version"])
+            row["latency_change"] = None
+            if previous and previous[0] == key and previous[1] and row["mean_latency"] is not None:
+                row["latency_change"] = row["mean_latency"] / previous[1] - 1
+            previous = (key, row["mean_latency"])
+            rows.append(row)
+        return rows
+    
+    def close(self) -> None:
+        self._db.close()
+
+def history_main(argv: List[str]) -> None:
+    """Sous-commande history : indexe les fichiers de résultats et affiche l'évolution des performances."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="evallm.py history",
+                                     description="Indexer les résultats dans une base SQLite et suivre latence et débit")
+    parser.add_argument("paths", nargs="*", default=["."],
+                        help="Fichiers JSON ou répertoires à indexer (défaut: répertoire courant)")
+    parser.add_argument("--db", default=str(HISTORY_DB), help=f"Base d'historique (défaut: {HISTORY_DB})")
+    parser.add_argument("--no-index", action="store_true", help="Interroger la base sans indexer de nouveaux fichiers")
+    parser.add_argument("--model", help="Limiter à un modèle")
+    parser.add_argument("--config", dest="config_hash", help="Limiter à une configuration (début de l'empreinte)")
+    parser.add_argument("--json", action="store_true", help="Afficher les lignes au format JSON")
+    args = parser.parse_args(argv)
+    
+    history = RunHistory(Path(args.db))
+    try:
+        if not args.no_index:
+            indexed, unchanged = history.index(args.paths)
+            logger.info(f"Historique {history.path} : {indexed} fichiers indexés, {unchanged} inchangés")
+        rows = history.trends(args.model, args.config_hash)
+    finally:
+        history.close()
+    
+    if args.json:
+        console.print_json(data=rows)
+        return
+    
+    from rich.table import Table
+    table = Table(title="Historique des exécutions")
+    for column in ("Date", "Configuration", "Modèle", "Serveur", "Version", "Réponses", "Erreurs",
+                   "Latence moy. (s)", "Latence p95 (s)", "Tokens/s", "Évolution"):
+        table.add_column(column, justify="right" if column not in ("Modèle", "Serveur") else "left")
+    for row in rows:
+        change = row["latency_change"]
+        table.add_row(
+            row["run_date"].replace("T", " "), row["config_hash"], row["model"], row["host"], row["evallm_version"],
+            str(row["responses"]), str(row["errors"]),
+            f"{row['mean_latency']:.2f}" if row["mean_latency"] is not None else "-",
+            f"{row['p95_latency']:.2f}" if row["p95_latency"] is not None else "-",
+            f"{row['tokens_per_s']:.1f}" if row["tokens_per_s"] is not None else "-",
+            "-" if change is None else f"[{'red' if change > 0 else 'green'}]{change:+.0%}[/]",
+        )
+    console.print(table)
+
+def diff_results(results_a: List[Result], results_b: List[Result], n_boot: int = STATS_BOOTSTRAP_SAMPLES,
+                 confidence: float = STATS_CONFIDENCE, min_change: float = DIFF_MIN_CHANGE,
+                 seed: int = 0) -> Dict[str, Any]:
+    """Compare deux exécutions : latence par modèle et par cellule, réponses modifiées, cellules manquantes.
+    
+    Une cellule regroupe les graines d'un même modèle, prompt système, prompt utilisateur, contexte et
+    température. Une régression est significative si l'intervalle de confiance bootstrap de la
+    différence des latences moyennes (B - A) est entièrement positif et dépasse min_change en relatif.
+    Sans NumPy, les différences sont calculées sans test de significativité.
+    """
+    try:
+        import numpy as np
+        rng = np.random.default_rng(seed)
+    except ImportError:
+        logger.warning("NumPy indisponible, les différences de latence ne sont pas testées")
+        np = None
+    
+    def latency_groups(results: List[Result]) -> tuple:
+        cells = {}
+        models = {}
+        for result in results:
+            if is_measured(result) and not result.response.startswith("ERREUR:"):
+                cell = (result.model, result.system_prompt_id, result.user_prompt_id, result.context_id,
+                        float(result.temperature))
+                cells.setdefault(cell, []).append(result.response_time)
+                models.setdefault((result.model, float(result.temperature)), []).append(result.response_time)
+        return cells, models
+    
+    def compare(a: List[float], b: List[float]) -> Dict[str, Any]:
+        mean_a = sum(a) / len(a)
+        mean_b = sum(b) / len(b)
+        row = {"n_a": len(a), "n_b": len(b), "mean_a": mean_a, "mean_b": mean_b,
+               "change": mean_b / mean_a - 1 if mean_a else None, "ci_low": None, "ci_high": None, "verdict": None}
+        if np is not None and len(a) > 1 and len(b) > 1:
+            a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+            boot_a = a[rng.integers(0, a.size, size=(n_boot, a.size))].mean(axis=1)
+            boot_b = b[rng.integers(0, b.size, size=(n_boot, b.size))].mean(axis=1)
+            alpha = (1 - confidence) / 2 * 100
+            row["ci_low"], row["ci_high"] = (float(v) for v in np.percentile(boot_b - boot_a, [alpha, 100 - alpha]))
+            if row["change"] is not None and abs(row["change"]) >= min_change:
+                if row["ci_low"] > 0:
+                    row["verdict"] = "regression"
+                elif row["ci_high"] < 0:
+                    row["verdict"] = "improvement"
+        return row
+    
+    cells_a, models_a = latency_groups(results_a)
+    cells_b, models_b = latency_groups(results_b)
+    models = [{"model": model, "temperature": temperature, **compare(models_a[key], models_b[key])}
+              for key in models_a if key in models_b for model, temperature in [key]]
+    cells = []
+    for key in cells_a:
+        if key in cells_b:
+            row = compare(cells_a[key], cells_b[key])
+            if row["verdict"]:
+                cells.append({"model": key[0], "system_prompt_id": key[1], "user_prompt_id": key[2],
+                              "context_id": key[3], "temperature": key[4], **row})
+    
+    responses_a = {iteration_key(r): r.response for r in results_a if r.status not in SKIPPED_STATUSES}
+    responses_b = {iteration_key(r): r.response for r in results_b if r.status not in SKIPPED_STATUSES}
+    changed = [
+        {"model": key[0], "system_prompt_id": key[1], "user_prompt_id": key[2], "context_id": key[3],
+         "seed": key[4], "temperature": key[5], "response_a": responses_a[key], "response_b": responses_b[key]}
+        for key in responses_a if key in responses_b and responses_a[key] != responses_b[key]
+    ]
+    return {
+        "confidence": confidence,
+        "min_change": min_change,
+        "models": models,
+        "cells": cells,
+        "changed_responses": changed,
+        "compared_responses": sum(1 for key in responses_a if key in responses_b),
+        "only_a": sum(1 for key in responses_a if key not in responses_b),
+        "only_b": sum(1 for key in responses_b if key not in responses_a),
+    }
+
+def diff_main(argv: List[str]) -> None:
+    """Sous-commande diff : régressions de latence et réponses modifiées entre deux exécutions."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="evallm.py diff",
+                                     description="Comparer deux fichiers de résultats (A : référence, B : nouvelle exécution)")
+    parser.add_argument("a", metavar="A.json", help="Exécution de référence")
+    parser.add_argument("b", metavar="B.json", help="Exécution à comparer")
+    parser.add_argument("--min-change", type=float, default=DIFF_MIN_CHANGE,
+                        help=f"Écart relatif de latence minimal pour signaler une régression (défaut: {DIFF_MIN_CHANGE})")
+    parser.add_argument("--show", type=int, default=10, help="Nombre de réponses modifiées affichées (défaut: 10)")
+    parser.add_argument("--output", "-o", metavar="DIFF.json", help="Enregistrer la comparaison au format JSON")
+    args = parser.parse_args(argv)
+    
+    diff = diff_results(load_results_file(args.a)["results"], load_results_file(args.b)["results"],
+                        min_change=args.min_change)
+    
+    from rich.table import Table
+    verdicts = {"regression": "[red]régression[/]", "improvement": "[green]amélioration[/]", None: ""}
+    table = Table(title=f"Latence par modèle (IC {diff['confidence']:.0%} bootstrap de B - A)")
+    for column in ("Modèle", "Temp.", "N (A/B)", "A (s)", "B (s)", "Évolution", "IC (s)", "Verdict"):
+        table.add_column(column, justify="left" if column == "Modèle" else "right")
+    for row in diff["models"]:
+        table.add_row(
+            row["model"], str(row["temperature"]), f"{row['n_a']}/{row['n_b']}", f"{row['mean_a']:.2f}",
+            f"{row['mean_b']:.2f}", f"{row['change']:+.0%}" if row["change"] is not None else "-",
+            f"[{row['ci_low']:+.2f}, {row['ci_high']:+.2f}]" if row["ci_low"] is not None else "-",
+            verdicts[row["verdict"]],
+        )
+    console.print(table)
+    
+    if diff["cells"]:
+        table = Table(title="Cellules dont la latence a significativement changé")
+        for column in ("Modèle", "Système", "Prompt", "Contexte", "Temp.", "A (s)", "B (s)", "Évolution", "Verdict"):
+            table.add_column(column)
+        for row in diff["cells"]:
+            table.add_row(row["model"], row["system_prompt_id"], row["user_prompt_id"], row["context_id"],
+                          str(row["temperature"]), f"{row['mean_a']:.2f}", f"{row['mean_b']:.2f}",
+                          f"{row['change']:+.0%}", verdicts[row["verdict"]])
+        console.print(table)
+    
+    console.print(f"Réponses modifiées : {len(diff['changed_responses'])}/{diff['compared_responses']} "
+                  f"(uniquement dans A : {diff['only_a']}, uniquement dans B : {diff['only_b']})")
+    for change in diff["changed_responses"][:args.show]:
+        console.print(f"\n[bold]{change['model']}[/] {change['system_prompt_id']}/{change['user_prompt_id']}/"
+                      f"{change['context_id']} seed={change['seed']} temp={change['temperature']}", highlight=False)
+        console.print(f"  A : {change['response_a'][:200]!r}", markup=False, highlight=False)
+        console.print(f"  B : {change['response_b'][:200]!r}", markup=False, highlight=False)
+    
+    if args.output:
+        Path(args.output).write_text(json.dumps(diff, indent=2, ensure_ascii=False), encoding="utf-8")
+        logger.info(f"Comparaison sauvegardée dans {args.output}")
+
+def expected_iteration_keys(config: ModelConfig) -> set:
+    """Clés de toutes les itérations prévues par une configuration, sans lire le contenu des textes en flux."""
+    sources = [list(open_text_source(config.user_prompts).keys()), list(open_text_source(config.contexts).keys())]
+    return {
+        (model, sys_id, prompt_id, ctx_id, seed, float(temperature))
+        for model in config.models for sys_id in config.system_prompts
+        for prompt_id in sources[0] for ctx_id in sources[1]
+        for seed in config.seeds for temperature in config.temperatures
+    }
+
+def merge_main(argv: List[str]) -> None:
+    """Sous-commande merge : combine les JSON des tranches (--shard) en un seul jeu de résultats et rapport."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="evallm.py merge",
+                                     description="Combiner les résultats des tranches d'une exécution (--shard i/N)")
+    parser.add_argument("files", nargs="+", metavar="TRANCHE.json", help="Fichiers de résultats des tranches")
+    parser.add_argument("--output", "-o", metavar="RAPPORT.html",
+                        help="Rapport HTML fusionné, le JSON est écrit à côté (défaut: <config>_<horodatage>.html)")
+    parser.add_argument("--schema-version", type=int, choices=RESULTS_SCHEMA_VERSIONS, default=1,
+                        help="Format du JSON fusionné : 1 (historique) ou 2 (normalisé)")
+    parser.add_argument("--allow-missing", action="store_true",
+                        help="Produire le rapport même si des itérations de la configuration manquent")
+    parser.add_argument("--report-mode", choices=REPORT_MODES, default="full",
+                        help="Rapport complet (full) ou compact, comme pour une exécution (défaut: full)")
+    args = parser.parse_args(argv)
+    
+    shards = [{"file": file, **load_results_file(file)} for file in args.files]
+    shards.sort(key=lambda data: data["extras"].get("shard", {}).get("index", 0))
+    
+    # Toutes les tranches doivent provenir de la même configuration
+    configs = {json.dumps(data["config"], sort_keys=True) for data in shards}
+    if len(configs) != 1 or shards[0]["config"] is None:
+        logger.error("Les fichiers ne proviennent pas de la même configuration, fusion impossible : "
+                     + ", ".join(f"{data['file']} ({text_ref(json.dumps(data['config'], sort_keys=True))})"
+                                 for data in shards))
+        return
+    config = ModelConfig(**shards[0]["config"])
+    
+    # Chaque tranche doit être présente une fois et complète
+    infos = [data["extras"].get("shard") for data in shards]
+    if all(infos):
+        counts = {info["count"] for info in infos}
+        indexes = sorted(info["index"] for info in infos)
+        if len(counts) != 1 or indexes != list(range(1, counts.pop() + 1)):
+            found = ", ".join(f"{info['index']}/{info['count']}" for info in infos)
+            logger.error(f"Tranches incohérentes ou manquantes : {found}")
+            if not args.allow_missing:
+                return
+        for data, info in zip(shards, infos):
+            if len(data["results"]) != info["end"] - info["start"]:
+                logger.warning(f"{data['file']} : {len(data['results'])} résultats pour "
+                               f"{info['end'] - info['start']} itérations (exécution interrompue ?)")
+    
+    results = []
+    seen = set()
+    duplicates = 0
+    for data in shards:
+        for result in data["results"]:
+            key = iteration_key(result)
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            results.append(result)
+    if duplicates:
+        logger.warning(f"{duplicates} itérations présentes dans plusieurs tranches, seule la première est conservée")
+    
+    try:
+        missing = expected_iteration_keys(config) - seen
+    except Exception as e:
+        logger.warning(f"Impossible d'énumérer les itérations de la configuration ({e}), "
+                       f"seul le découpage en tranches a été vérifié")
+        missing = set()
+    if missing:
+        logger.error(f"{len(missing)} itérations de la configuration sont absentes des tranches, par exemple : "
+                     + "; ".join(" / ".join(map(str, key)) for key in sorted(missing)[:5]))
+        if not args.allow_missing:
+            return
+    
+    # Informations système de la première tranche, serveurs et chargements de toutes
+    system_info = SystemInfo(**{field.name: (shards[0]["system_info"] or {}).get(field.name)
+                                for field in fields(SystemInfo)})
+    system_info.hosts = [host for data in shards for host in (data["system_info"] or {}).get("hosts") or []]
+    model_loads = [load for data in shards for load in data["extras"].get("model_loads") or []]
+    
+    output_file = args.output
+    if not output_file:
+        prefix = RUN_TIMESTAMP_RE.sub("", SHARD_NAME_RE.sub("", Path(shards[0]["file"]).stem))
+        output_file = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
+    
+    scoring = score_run(results, config)
+    statistics = compute_statistics(results)
+    generate_html_report(results, system_info, config, output_file, list(config.models), statistics, scoring,
+                         model_loads, report_mode=args.report_mode)
+    json_output = Path(output_file).with_suffix('.json')
+    json_output.write_text(json.dumps(
+        build_results_payload(system_info, config, results, args.schema_version, {
+            "model_loads": model_loads or None,
+            "statistics": statistics,
+            "scoring": scoring,
+            "merged_from": [data["file"] for data in shards],
+        }),
+        indent=2, ensure_ascii=False
+    ), encoding='utf-8')
+    logger.info(f"{len(shards)} tranches fusionnées ({len(results)} résultats) dans {json_output}")
+
+class MockBackend:
+    """Serveur Ollama simulé, pour tester evallm sans Ollama et mesurer son propre surcoût.
+    
+    La latence avant le premier token, le débit de décodage et le temps de chargement sont
+    configurables. Les réponses peuvent être rejouées depuis des JSON de résultats : même
+    modèle, mêmes messages, même graine et même température donnent la réponse enregistrée,
+    sinon une réponse enregistrée du même modèle, sinon un texte synthétique.
+    """
+    
+    def __init__(self, models: Optional[List[str]] = None, latency: float = 0.0, tokens_per_s: float = 0.0,
+                 load_time: float = 0.0, replay: Iterable[str] = ()):
+        self.latency = latency
+        self.tokens_per_s = tokens_per_s
+        self.load_time = load_time
+        self._replayed = {}
+        self._by_model = {}
+        for path in replay:
+            for result in load_results_file(path)["results"]:
+                if result.response.startswith("ERREUR:") or result.status:
+                    continue
+                # Le fichier ne dit pas dans quel ordre le contexte a été envoyé : les deux sont indexés
+                for context_first in (False, True):
+                    key = self.key(result.model, build_messages(result, context_first), result.seed, result.temperature)
+                    self._replayed.setdefault(key, result.response)
+                self._by_model.setdefault(result.model, []).append(result.response)
+        self.models = list(models or self._by_model or ["mock:latest"])
+        self.loaded = set()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(model: str, messages: List[Dict[str, str]], seed: Any, temperature: Any) -> tuple:
+        digest = content_hash(json.dumps(messages, sort_keys=True, ensure_ascii=False))
+        return (model, digest, seed, float(temperature) if temperature is not None else None)
+    
+    def respond(self, model: str, messages: List[Dict[str, str]], options: Dict[str, Any]) -> str:
+        seed = options.get("seed")
+        response = self._replayed.get(self.key(model, messages, seed, options.get("temperature")))
+        if response is not None:
+            return response
+        recorded = self._by_model.get(model)
+        if recorded:
+            return recorded[(seed or 0) % len(recorded)]
+        return f"Réponse simulée de {model} (seed={seed}) : 09/09/1999."
+    
+    def load(self, model: str) -> int:
+        """Charge le modèle s'il ne l'est pas et renvoie la durée de chargement en nanosecondes."""
+        with self._lock:
+            if model in self.loaded:
+                return 0
+            self.loaded.add(model)
+        time.sleep(self.load_time)
+        return int(self.load_time * NS_PER_S)
+    
+    def chat(self, request: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Produit les fragments d'une réponse de /api/chat, le dernier portant les compteurs."""
+        model = request.get("model")
+        messages = request.get("messages") or []
+        options = request.get("options") or {}
+        text = self.respond(model, messages, options)
+        tokens = [text[i:i + MOCK_CHARS_PER_TOKEN] for i in range(0, len(text), MOCK_CHARS_PER_TOKEN)]
+        truncated = bool(options.get("num_predict")) and len(tokens) > options["num_predict"]
+        if truncated:
+            tokens = tokens[:options["num_predict"]]
+        
+        start = time.perf_counter()
+        load_ns = self.load(model)
+        time.sleep(self.latency)
+        decode_start = time.perf_counter()
+        created_at = datetime.now().isoformat()
+        for token in tokens:
+            if self.tokens_per_s:
+                time.sleep(1 / self.tokens_per_s)
+            yield {"model": model, "created_at": created_at, "message": {"role": "assistant", "content": token}, "done": False}
+        end = time.perf_counter()
+        yield {
+            "model": model,
+            "created_at": created_at,
+            "message": {"role": "assistant", "content": ""},
+            "done": True,
+            "done_reason": "length" if truncated else "stop",
+            "total_duration": int((end - start) * NS_PER_S),
+            "load_duration": load_ns,
+            "prompt_eval_count": sum(len(m.get("content", "")) for m in messages) // MOCK_CHARS_PER_TOKEN + 1,
+            "prompt_eval_duration": int(self.latency * NS_PER_S),
+            "eval_count": len(tokens),
+            "eval_duration": int((end - decode_start) * NS_PER_S),
+        }
+    
+    def generate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Seuls le chargement et le déchargement (prompt vide) de /api/generate sont simulés."""
+        model = request.get("model")
+        if request.get("keep_alive") == 0:
+            with self._lock:
+                self.loaded.discard(model)
+            return {"model": model, "created_at": datetime.now().isoformat(), "response": "", "done": True,
+                    "done_reason": "unload"}
+        load_ns = self.load(model)
+        return {"model": model, "created_at": datetime.now().isoformat(), "response": "", "done": True,
+                "done_reason": "load", "load_duration": load_ns, "total_duration": load_ns}
+    
+    def describe(self, models: Iterable[str]) -> Dict[str, Any]:
+        return {"models": [{"name": model, "model": model, "size": 0, "digest": content_hash(model),
+                            "modified_at": datetime.now().isoformat(), "details": {}} for model in models]}
+
+def start_mock_server(backend: MockBackend, host: str = "127.0.0.1", port: int = 0) -> Any:
+    """Expose le serveur simulé en HTTP (/api/version, /api/tags, /api/ps, /api/chat, /api/generate).
+    
+    Le serveur tourne dans un thread ; server_address donne le port effectivement choisi.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class MockHandler(BaseHTTPRequestHandler):
+        def log_message(self, format: str, *args: Any) -> None:
+            logger.debug(f"[mock] {format % args}")
+        
+        def send_json(self, data: Dict[str, Any], status: int = 200) -> None:
+            body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def do_GET(self) -> None:
+            if self.path == "/api/version":
+                self.send_json({"version": f"mock-{EVALLM_VERSION}"})
+            elif self.path == "/api/tags":
+                self.send_json(backend.describe(backend.models))
+            elif self.path == "/api/ps":
+                self.send_json(backend.describe(sorted(backend.loaded)))
+            else:
+                self.send_json({"error": f"{self.path} non simulé"}, 404)
+        
+        def do_POST(self) -> None:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if request.get("model") not in backend.models:
+                self.send_json({"error": f"model '{request.get('model')}' not found"}, 404)
+            elif self.path == "/api/generate":
+                self.send_json(backend.generate(request))
+            elif self.path != "/api/chat":
+                self.send_json({"error": f"{self.path} non simulé"}, 404)
+            elif not request.get("stream", True):
+                chunks = list(backend.chat(request))
+                final = chunks[-1]
+                final["message"]["content"] = "".join(chunk["message"]["content"] for chunk in chunks)
+                self.send_json(final)
+            else:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                try:
+                    for chunk in backend.chat(request):
+                        self.wfile.write(json.dumps(chunk, ensure_ascii=False).encode("utf-8") + b"\n")
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Le client a fermé le flux (délai dépassé) : la génération simulée s'arrête
+                    logger.debug("[mock] génération interrompue par le client")
+    
+    server = ThreadingHTTPServer((host, port), MockHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="evallm-mock", daemon=True).start()
+    return server
+
+def mock_server_main(argv: List[str]) -> None:
+    """Sous-commande mock-server : serveur Ollama simulé pour tester evallm hors ligne."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="evallm.py mock-server",
+                                     description="Serveur Ollama simulé (/api/chat, /api/tags, /api/version)")
+    parser.add_argument("--host", default="127.0.0.1", help="Adresse d'écoute (défaut: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=MOCK_DEFAULT_PORT, help=f"Port d'écoute (défaut: {MOCK_DEFAULT_PORT})")
+    parser.add_argument("--models", nargs="+", help="Modèles annoncés (défaut: ceux des fichiers rejoués, sinon mock:latest)")
+    parser.add_argument("--latency", type=float, default=0.0, metavar="SECONDES",
+                        help="Latence avant le premier token (défaut: 0)")
+    parser.add_argument("--tokens-per-s", type=float, default=0.0,
+                        help="Débit de décodage simulé, 0 pour une réponse instantanée (défaut: 0)")
+    parser.add_argument("--load-time", type=float, default=0.0, metavar="SECONDES",
+                        help="Temps de chargement simulé d'un modèle (défaut: 0)")
+    parser.add_argument("--replay", action="append", default=[], metavar="RESULTATS.json",
+                        help="Rejouer les réponses d'un fichier de résultats (option répétable)")
+    args = parser.parse_args(argv)
+    
+    backend = MockBackend(args.models, args.latency, args.tokens_per_s, args.load_time, args.replay)
+    server = start_mock_server(backend, args.host, args.port)
+    logger.info(f"Serveur Ollama simulé sur http://{args.host}:{server.server_address[1]} "
+                f"(modèles : {', '.join(backend.models)})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+def measure_harness_overhead(ollama_url: str, model: str, iterations: int, work_dir: Path) -> Dict[str, float]:
+    """Mesure le surcoût séquentiel d'evallm par itération face au serveur simulé sans latence.
+    
+    Deux exécutions de tailles différentes sont comparées : la pente du temps hors appels
+    donne le surcoût par itération, indépendamment des coûts fixes (configuration, rapport).
+    Une première exécution d'une itération, non comptée, absorbe les imports et caches initiaux.
+    """
+    runs = []
+    for n in (1, max(1, iterations // 5), iterations):
+        config_file = work_dir / f"bench_{n}.json"
+        config_file.write_text(json.dumps({
+            "models": [model],
+            "system_prompts": {"s": "Tu es un assistant précis."},
+            "user_prompts": {"u": "Quelle est la date ?"},
+            "contexts": {"c": "Le document est daté du 09/09/1999."},
+            "seeds": list(range(n)),
+            "temperatures": [0.0],
+        }), encoding="utf-8")
+        start = time.perf_counter()
+        results = compare_llms(str(config_file), None, ollama_url, RunOptions(open_browser=False, show_progress=False))
+        runs.append((n, time.perf_counter() - start, sum(result.response_time for result in results)))
+    
+    (n1, wall1, calls1), (n2, wall2, calls2) = runs[1:]
+    return {
+        "iterations": n2,
+        "wall_s": wall2,
+        "call_ms": calls2 / n2 * 1000,
+        "overhead_ms": ((wall2 - calls2) - (wall1 - calls1)) / (n2 - n1) * 1000 if n2 > n1 else None,
+    }
+
+def measure_report_time(size: int, system_info: SystemInfo, responses: List[str], work_dir: Path) -> Dict[str, float]:
+    """Mesure la construction des Result, l'analyse statistique, le rapport HTML et le JSON pour size résultats."""
+    models = ["bench-a:1b", "bench-b:7b", "bench-c:13b", "bench-d:70b"]
+    temperatures = [0.0, 0.7]
+    seeds = list(range(max(1, size // (len(models) * len(temperatures)))))
+    config = ModelConfig(models=models, system_prompts={"s": "Système"}, user_prompts={"u": "Question"},
+                         contexts={"c": "Contexte"}, seeds=seeds, temperatures=temperatures)
+    timings = {"results": len(models) * len(temperatures) * len(seeds)}
+    
+    start = time.perf_counter()
+    results = [
+        Result(model=model, system_prompt="Système", system_prompt_id="s", user_prompt="Question",
+               user_prompt_id="u", context="Contexte", context_id="c", seed=seed, temperature=temperature,
+               response=f"{responses[(seed + index) % len(responses)]} [{seed}]", response_time=1.0 + seed % 7 / 10,
+               commentaire="", eval_count=50 + seed % 30, eval_duration=1_000_000_000)
+        for index, model in enumerate(models) for seed in seeds for temperature in temperatures
+    ]
+    timings["build_s"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    statistics = compute_statistics(results)
+    timings["statistics_s"] = time.perf_counter() - start
+    
+    output_file = work_dir / f"bench_report_{size}.html"
+    start = time.perf_counter()
+    generate_html_report(results, system_info, config, str(output_file), models, statistics)
+    timings["html_s"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    output_file.with_suffix(".json").write_text(json.dumps(
+        build_results_payload(system_info, config, results, extras={"statistics": statistics}),
+        indent=2, ensure_ascii=False
+    ), encoding="utf-8")
+    timings["json_s"] = time.perf_counter() - start
+    return timings
+
+def bench_main(argv: List[str]) -> None:
+    """Sous-commande bench : surcoût d'evallm par itération et temps de génération du rapport."""
+    import argparse
+    import tempfile
+    
+    parser = argparse.ArgumentParser(prog="evallm.py bench",
+                                     description="Mesurer le surcoût d'evallm face à un serveur Ollama simulé")
+    parser.add_argument("--iterations", type=int, default=200, help="Itérations de la mesure de surcoût (défaut: 200)")
+    parser.add_argument("--sizes", default=",".join(map(str, BENCH_REPORT_SIZES)),
+                        help="Nombres de résultats pour la mesure du rapport, séparés par des virgules "
+                             f"(défaut: {','.join(map(str, BENCH_REPORT_SIZES))})")
+    parser.add_argument("--replay", action="append", default=[], metavar="RESULTATS.json",
+                        help="Utiliser les réponses d'un fichier de résultats (option répétable)")
+    parser.add_argument("--output", "-o", metavar="BENCH.json", help="Enregistrer les mesures au format JSON")
+    args = parser.parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    if args.iterations < 2:
+        parser.error("--iterations doit être au moins 2")
+    
+    backend = MockBackend(replay=args.replay)
+    server = start_mock_server(backend)
+    ollama_url = f"http://127.0.0.1:{server.server_address[1]}"
+    responses = [response for recorded in backend._by_model.values() for response in recorded] or [
+        "La date mentionnée dans le document est le 09/09/1999. " * 4
+    ]
+    
+    levels = {name: logging.getLogger(name).level for name in ("evallm", "httpx")}
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory(prefix="evallm-bench-") as work_dir:
+            # compare_llms écrit ses fichiers dans le répertoire courant et journalise chaque étape
+            os.chdir(work_dir)
+            for name in levels:
+                logging.getLogger(name).setLevel(logging.WARNING)
+            logger.warning(f"Mesure du surcoût par itération ({args.iterations} itérations)...")
+            overhead = measure_harness_overhead(ollama_url, backend.models[0], args.iterations, Path(work_dir))
+            system_info = get_system_info(ollama_url)
+            reports = []
+            for size in sizes:
+                logger.warning(f"Mesure du rapport pour {size} résultats...")
+                reports.append(measure_report_time(size, system_info, responses, Path(work_dir)))
+    finally:
+        os.chdir(cwd)
+        for name, level in levels.items():
+            logging.getLogger(name).setLevel(level)
+        server.shutdown()
+    
+    from rich.table import Table
+    table = Table(title="Surcoût d'evallm (serveur simulé sans latence)")
+    for column in ("Itérations", "Durée totale (s)", "Appel HTTP moyen (ms)", "Surcoût par itération (ms)"):
+        table.add_column(column, justify="right")
+    table.add_row(str(overhead["iterations"]), f"{overhead['wall_s']:.2f}", f"{overhead['call_ms']:.2f}",
+                  f"{overhead['overhead_ms']:.2f}" if overhead["overhead_ms"] is not None else "-")
+    console.print(table)
+    
+    table = Table(title="Génération du rapport")
+    for column in ("Résultats", "Construction (s)", "Statistiques (s)", "HTML (s)", "JSON (s)"):
+        table.add_column(column, justify="right")
+    for report in reports:
+        table.add_row(str(report["results"]), f"{report['build_s']:.2f}", f"{report['statistics_s']:.2f}",
+                      f"{report['html_s']:.2f}", f"{report['json_s']:.2f}")
+    console.print(table)
+    
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "evallm_version": EVALLM_VERSION,
+            "date": datetime.now().isoformat(),
+            "hostname": platform.node(),
+            "overhead": overhead,
+            "reports": reports,
+        }, indent=2, ensure_ascii=False), encoding="utf-8")
+        logger.info(f"Mesures sauvegardées dans {args.output}")
+
+SUBCOMMANDS = {
+    "history": history_main,
+    "diff": diff_main,
+    "merge": merge_main,
+    "bench": bench_main,
+    "mock-server": mock_server_main,
+}
+
 def main():
     """Fonction principale pour exécuter le script depuis la ligne de commande."""
     import argparse
     
-    parser = argparse.ArgumentParser(description="Comparer des LLM avec Ollama et générer un rapport HTML")
+    # Sous-commandes (evallm.py bench ...), la forme historique evallm.py config.json reste inchangée
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        SUBCOMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+    
+    parser = argparse.ArgumentParser(description="Comparer des LLM avec Ollama et générer un rapport HTML",
+                                     epilog=f"Sous-commandes : {', '.join(SUBCOMMANDS)} (evallm.py <sous-commande> --help)")
     parser.add_argument("config", help="Fichier de configuration JSON", nargs='?')
     parser.add_argument("--output", "-o", help="Fichier de sortie HTML (optionnel)")
     parser.add_argument("--debug", action="store_true", help="Activer le mode debug")
     parser.add_argument("--list", action="store_true", help="Afficher la liste des modèles disponibles au format JSON")
-    parser.add_argument("--ollama-url", help=f"URL du serveur Ollama (défaut: {DEFAULT_OLLAMA_URL})", default=DEFAULT_OLLAMA_URL)
+    parser.add_argument("--ollama-url", action="append",
+                        help=f"URL d'un serveur Ollama, répétable pour répartir les requêtes (défaut: {DEFAULT_OLLAMA_URL})")
+    parser.add_argument("--concurrency", "-j", type=int, default=1,
+                        help="Nombre de requêtes simultanées par serveur (à aligner sur OLLAMA_NUM_PARALLEL, défaut: 1)")
+    parser.add_argument("--cache", choices=CACHE_MODES, default="off",
+                        help="Cache persistant des réponses : off, read (lecture seule) ou readwrite (défaut: off)")
+    parser.add_argument("--cache-dir", default=str(CACHE_DIR), help=f"Répertoire du cache (défaut: {CACHE_DIR})")
+    parser.add_argument("--stream", action="store_true",
+                        help="Générer en streaming pour mesurer le temps jusqu'au premier token (TTFT) et les écarts entre tokens")
+    parser.add_argument("--context-first", action="store_true",
+                        help="Placer le contexte avant le prompt utilisateur et enchaîner les requêtes de même préfixe "
+                             "(système + contexte) pour profiter du cache KV d'Ollama")
+    parser.add_argument("--schema-version", type=int, choices=RESULTS_SCHEMA_VERSIONS, default=1,
+                        help="Format du JSON de résultats : 1 (historique) ou 2 (normalisé, textes stockés une seule fois)")
+    parser.add_argument("--sample-interval", type=float, default=DEFAULT_SAMPLE_INTERVAL, metavar="SECONDES",
+                        help=f"Période d'échantillonnage des ressources (RSS Ollama, mémoire, CPU, GPU) pendant les "
+                             f"générations, 0 pour désactiver (défaut: {DEFAULT_SAMPLE_INTERVAL})")
+    parser.add_argument("--score-mode", choices=SCORE_MODES,
+                        help="Mode de comparaison aux réponses attendues (resultats), remplace celui de la configuration")
+    parser.add_argument("--early-stop", type=int, metavar="N",
+                        help="Cesser d'interroger de nouvelles graines pour une cellule après N réponses identiques "
+                             "consécutives, remplace early_stop de la configuration (0 pour désactiver)")
+    parser.add_argument("--early-stop-latency", type=float, metavar="TOLERANCE",
+                        help="Cesser d'interroger de nouvelles graines pour une cellule quand l'intervalle de confiance "
+                             "à 95 %% de la latence moyenne est inférieur à TOLERANCE × moyenne (ex. 0.05)")
+    parser.add_argument("--num-predict", type=int, metavar="N",
+                        help="Nombre maximal de tokens générés par réponse, remplace num_predict de la configuration")
+    parser.add_argument("--timeout", type=float, metavar="SECONDES",
+                        help="Durée maximale d'un appel, la réponse partielle est conservée (remplace timeout de la configuration)")
+    parser.add_argument("--budget", type=float, metavar="SECONDES",
+                        help="Durée maximale de l'exécution, les itérations restantes sont marquées non exécutées "
+                             "(remplace budget de la configuration)")
+    parser.add_argument("--keep-loaded", action="store_true",
+                        help="Garder les modèles précédents en mémoire au changement de modèle (petits modèles "
+                             "tenant ensemble en mémoire), sinon ils sont déchargés avant le chargement du suivant")
+    parser.add_argument("--no-browser", action="store_true", help="Ne pas ouvrir le rapport dans le navigateur")
+    parser.add_argument("--shard", metavar="i/N",
+                        help="N'exécuter que la i-ème des N tranches de la matrice (regroupées par modèle), "
+                             "à combiner ensuite avec la sous-commande merge")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="Exposer les compteurs en direct (débits, requêtes en cours, erreurs, latences, temps "
+                             "restant) au format Prometheus sur http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-file", metavar="FICHIER.prom",
+                        help="Réécrire périodiquement les mêmes compteurs dans un fichier (collecteur textfile de node_exporter)")
+    parser.add_argument("--cluster-threshold", type=float, default=CLUSTER_THRESHOLD, metavar="SIMILARITE",
+                        help=f"Similarité (0 à 1) à partir de laquelle les réponses d'une même cellule sont regroupées "
+                             f"dans le rapport et affichées en différences, 0 pour désactiver (défaut: {CLUSTER_THRESHOLD})")
+    parser.add_argument("--report-mode", choices=REPORT_MODES, default="full",
+                        help="full : chaque réponse est écrite dans le rapport ; compact : réponses embarquées une seule "
+                             "fois et compressées, tableaux détaillés construits au défilement, pour les rapports de "
+                             "plusieurs milliers de résultats (défaut: full)")
+    parser.add_argument("--trace", action="store_true",
+                        help="Enregistrer la durée de chaque phase et de chaque itération dans un fichier .trace.json "
+                             "à côté du rapport (format Chrome/Perfetto)")
+    parser.add_argument("--resume", metavar="PRECEDENT.json",
+                        help="Reprendre une exécution interrompue en ne relançant que les itérations manquantes")
     args = parser.parse_args()
     
     if args.debug:
         logger.setLevel(logging.DEBUG)
         logger.debug("Mode debug activé")
     
+    ollama_urls = args.ollama_url or [DEFAULT_OLLAMA_URL]
+    
     if args.list:
         try:
-            # Configuration de l'URL d'Ollama
-            ollama.base_url = args.ollama_url
-            available_models = [model.model for model in ollama.list().models]
+            available_models = {url: model_names(ollama_api_get(url, "tags")) for url in ollama_urls}
+            if len(ollama_urls) == 1:
+                available_models = available_models[ollama_urls[0]]
             console.print_json(data=available_models)
             return
         except Exception as e:
@@ -746,7 +4011,41 @@ def main():
     if not args.config:
         parser.error("Le fichier de configuration est requis sauf si --list est utilisé")
     
-    compare_llms(args.config, args.output, args.ollama_url)
+    if args.concurrency < 1:
+        parser.error("--concurrency doit être supérieur ou égal à 1")
+    
+    if (args.early_stop or 0) < 0 or (args.early_stop_latency or 0) < 0:
+        parser.error("--early-stop et --early-stop-latency doivent être positifs")
+    
+    if any(value is not None and value <= 0 for value in (args.num_predict, args.timeout, args.budget)):
+        parser.error("--num-predict, --timeout et --budget doivent être strictement positifs")
+    
+    shard = None
+    if args.shard:
+        match = re.fullmatch(r"(\d+)/(\d+)", args.shard)
+        if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+            parser.error("--shard attend i/N avec 1 <= i <= N, par exemple 2/4")
+        shard = (int(match.group(1)), int(match.group(2)))
+    
+    if args.metrics_port is not None and not 0 <= args.metrics_port <= 65535:
+        parser.error("--metrics-port doit être compris entre 0 et 65535")
+    
+    if not 0 <= args.cluster_threshold <= 1:
+        parser.error("--cluster-threshold doit être compris entre 0 et 1")
+    
+    if args.resume and not Path(args.resume).exists():
+        parser.error(f"Le fichier à reprendre {args.resume} n'existe pas")
+    
+    options = RunOptions(concurrency=args.concurrency, resume=args.resume, cache=args.cache,
+                         cache_dir=Path(args.cache_dir), stream=args.stream, context_first=args.context_first,
+                         schema_version=args.schema_version, sample_interval=args.sample_interval,
+                         score_mode=args.score_mode, early_stop=args.early_stop,
+                         early_stop_latency=args.early_stop_latency, num_predict=args.num_predict,
+                         timeout=args.timeout, budget=args.budget, keep_loaded=args.keep_loaded,
+                         open_browser=not args.no_browser, shard=shard, metrics_port=args.metrics_port,
+                         metrics_file=args.metrics_file, cluster_threshold=args.cluster_threshold,
+                         report_mode=args.report_mode, trace=args.trace)
+    compare_llms(args.config, args.output, ollama_urls, options)
 
 if __name__ == "__main__":
     main()